@@ -2,7 +2,8 @@
 
 import logging
 import os
-from typing import Final
+import threading
+from typing import Any, Final
 
 from flask import Flask
 from flask_bootstrap import Bootstrap
@@ -10,7 +11,7 @@ from flask_migrate import Migrate
 from pydantic import ValidationError
 from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
-from werkzeug.exceptions import HTTPException
+from werkzeug.exceptions import HTTPException, NotFound
 
 from app.configs.cache_cfg import CacheConfig
 from app.configs.lazy_cfg_loader import LazyImporter
@@ -18,14 +19,19 @@ from app.configs.log_cfg import log, LOG_NAME
 import app.const as consts
 from app.core.api import api
 from app.core.cache import app_cache
+from app.core.cli import cache_cli, warm_app_cache
 from app.core.limiter import app_limiter
+from app.core.pool_stats import app_pool_stats
+from app.core.replicas import app_replicas
+from app.core.write_stats import app_write_stats
 from app.error import handler_api
-from app.models.database import db
+from app.models.database import db, get_engines
 
 # this import should be in place, to let migrate command find the tables
 from app.models import models, schemas
 from app.routes import cache_ns, health_ns
 from app.routes.models import crud_route_ns, money_ns
+from app.service.cache_service import check_cache_policies
 
 
 BASE_PATH: Final[str] = "/api"
@@ -51,11 +57,14 @@ def create_app() -> Flask:
         )
     app.config.from_object(db_config)
     app.config.from_object(CacheConfig)
+    # a policy that is not valid stops the app, not each request
+    check_cache_policies(app.config["CACHE_POLICIES"])
     api.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
     bootstrap.init_app(app)
     app_cache.init_app(app)
+    app_replicas.init_app(app)
     app_limiter.init_app(app)
 
     # Integrate the logger with the Flask app
@@ -65,6 +74,8 @@ def create_app() -> Flask:
     api.error_handlers[ValidationError] = handler_api.val_exc_handler
     api.error_handlers[IntegrityError] = handler_api.sqlalchemy_exc_handler
     api.error_handlers[Exception] = handler_api.base_exc_handler
+    # urls that match no route, e.g. a crud id that is not an integer
+    app.register_error_handler(NotFound, handler_api.http_exc_handler)
 
     api_routes = [
         {
@@ -135,6 +146,8 @@ def create_app() -> Flask:
     for ns in namespaces:
         api.add_namespace(ns)
 
+    app.cli.add_command(cache_cli)
+
     with app.app_context():
 
         @event.listens_for(db.engine, "before_cursor_execute")
@@ -144,4 +157,14 @@ def create_app() -> Flask:
             log.info("SQL Query: \n%s", statement)
             log.info("SQL Args: \n%s", parameters)
 
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def count_round_trip(*_args: Any) -> None:
+            app_write_stats.count_round_trip()
+
+        for name, engine in get_engines().items():
+            app_pool_stats.watch(engine, name)
+
+    if app.config["CACHE_WARMUP"] == "start":
+        threading.Thread(target=warm_app_cache, args=(app,), daemon=True).start()
+
     return app
@@ -1,8 +1,66 @@
 """Cache config class"""
 
+import json
+import os
+import tempfile
+
+import app.const as consts
+
 
 class CacheConfig:
     """Base Cache props"""
 
-    CACHE_TYPE = "SimpleCache"
+    # use app.core.cache_backends.TieredCache to share entries between workers
+    # or app.core.cache_backends.LruCache to bound the memory of each worker
+    CACHE_TYPE = os.getenv(consts.envs.CACHE_TYPE, "SimpleCache")
     CACHE_DEFAULT_TIMEOUT = 3600
+    # LruCache props, max entries and max bytes (0 means no byte limit)
+    CACHE_THRESHOLD = int(os.getenv(consts.envs.CACHE_THRESHOLD, "500"))
+    CACHE_MAX_BYTES = int(os.getenv(consts.envs.CACHE_MAX_BYTES, str(64 * 1024**2)))
+    # policy by namespace, exact names win over patterns. Each one may set
+    # timeout, negative_timeout, enabled, serializer (json or pickle)
+    # and max_filters,
+    # CACHE_POLICIES env is a json object merged over these defaults
+    CACHE_POLICIES = {
+        # catalog data that almost never changes
+        "games": {"timeout": 7 * 24 * 3600},
+        "factions": {"timeout": 7 * 24 * 3600},
+        # unit costs by faction are edited often
+        "*xfactions": {"timeout": 300},
+        "*-money": {"timeout": 300},
+        **json.loads(os.getenv(consts.envs.CACHE_POLICIES, "{}")),
+    }
+    # max filtered lists cached by namespace, until its next invalidation
+    CACHE_MAX_FILTERS = int(os.getenv(consts.envs.CACHE_MAX_FILTERS, "100"))
+    # after these seconds a value is stale, it is returned while it is
+    # refreshed in background, until CACHE_DEFAULT_TIMEOUT. 0 disables it
+    CACHE_SOFT_TIMEOUT = int(os.getenv(consts.envs.CACHE_SOFT_TIMEOUT, "0"))
+    # empty or missing results are kept for a shorter time
+    CACHE_NEGATIVE_TIMEOUT = int(os.getenv(consts.envs.CACHE_NEGATIVE_TIMEOUT, "60"))
+    # local: one loader per key in each process
+    # distributed: also hold a backend lock using add(), shared by all workers
+    CACHE_LOCK_MODE = os.getenv(consts.envs.CACHE_LOCK_MODE, "local")
+    # max seconds to wait for a concurrent loader before loading by itself
+    CACHE_LOCK_TIMEOUT = float(os.getenv(consts.envs.CACHE_LOCK_TIMEOUT, "10"))
+    CACHE_LOCK_POLL_INTERVAL = 0.05
+    # TieredCache props, L2 is a Flask-Caching backend shared by the workers,
+    # with atomic add and inc
+    CACHE_L1_MAX_ENTRIES = int(os.getenv(consts.envs.CACHE_L1_MAX_ENTRIES, "500"))
+    CACHE_L1_MAX_BYTES = int(
+        os.getenv(consts.envs.CACHE_L1_MAX_BYTES, str(16 * 1024**2))
+    )
+    # max seconds an entry lives in L1, L2 keeps the real timeout
+    CACHE_L1_TIMEOUT = 30
+    # max seconds between checks of the invalidation channel
+    CACHE_L1_SYNC_INTERVAL = 0.5
+    CACHE_L2_TYPE = os.getenv(
+        consts.envs.CACHE_L2_TYPE, "app.core.cache_backends.AtomicFileSystemCache"
+    )
+    CACHE_DIR = os.getenv(
+        consts.envs.CACHE_DIR, os.path.join(tempfile.gettempdir(), "candc-cache")
+    )
+    CACHE_REDIS_URL = os.getenv(consts.envs.CACHE_REDIS_URL)
+    # start: warm in background when app is created
+    # worker: warm on each gunicorn worker before it accepts requests
+    CACHE_WARMUP = os.getenv(consts.envs.CACHE_WARMUP, "")
+    CACHE_WARMUP_WORKERS = int(os.getenv(consts.envs.CACHE_WARMUP_WORKERS, "4"))
@@ -1,11 +1,102 @@
 """Configs to properly connect with the database"""
 
-from sqlalchemy.pool import QueuePool
+from collections.abc import Callable, Mapping
+from typing import Any, NamedTuple
+
+import app.const as consts
+from app.core.pool_stats import InstrumentedQueuePool
+
+
+class PoolConfig(NamedTuple):
+    """Connection pool of each engine, the primary and every replica"""
+
+    # connections kept open
+    size: int = 5
+    # extra connections opened under load, -1 means no limit
+    max_overflow: int = 10
+    # seconds to wait for a connection before failing the request
+    timeout: float = 30
+    # seconds before a connection is replaced, -1 never replaces them
+    recycle: int = -1
+    # test each connection with a round trip when it is checked out
+    pre_ping: bool = False
+
+    def get_engine_options(self) -> dict[str, Any]:
+        """SQLALCHEMY_ENGINE_OPTIONS of the pool"""
+        return {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": self.size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.timeout,
+            "pool_recycle": self.recycle,
+            "pool_pre_ping": self.pre_ping,
+        }
+
+
+def _to_bool(value: str) -> bool:
+    if value.lower() in {"1", "true", "yes"}:
+        return True
+    if value.lower() in {"0", "false", "no"}:
+        return False
+    raise ValueError(value)
+
+
+def _read_setting(
+    config: Mapping[str, str | None],
+    name: str,
+    parse: Callable[[str], Any],
+    default: Any,
+    minimum: float | None = None,
+) -> Any:
+    """Typed value of a setting, the default if it is not set"""
+    value = (config.get(name) or "").strip()
+    if not value:
+        return default
+    try:
+        result = parse(value)
+    except ValueError as exc:
+        raise ValueError(f"{name} is not valid, got '{value}'") from exc
+    if minimum is not None and result < minimum:
+        raise ValueError(f"{name} should be at least {minimum}, got '{value}'")
+    return result
+
+
+def get_pool_config(config: Mapping[str, str | None]) -> PoolConfig:
+    """
+    Pool settings from the env or a dotenv file.
+        Args:
+            config (Mapping): env values like POOL_SIZE=10.
+        Returns:
+            PoolConfig: typed settings, raise ValueError if any is not valid
+    """
+    default = PoolConfig()
+    envs = consts.envs
+    return PoolConfig(
+        size=_read_setting(config, envs.POOL_SIZE, int, default.size, 1),
+        max_overflow=_read_setting(
+            config, envs.POOL_MAX_OVERFLOW, int, default.max_overflow, -1
+        ),
+        timeout=_read_setting(config, envs.POOL_TIMEOUT, float, default.timeout, 0),
+        recycle=_read_setting(config, envs.POOL_RECYCLE, int, default.recycle, -1),
+        pre_ping=_read_setting(config, envs.POOL_PRE_PING, _to_bool, default.pre_ping),
+    )
+
+
+def get_replica_uris(urls: str | None) -> list[str]:
+    """Replica uris from a comma separated env value"""
+    return [url.strip() for url in (urls or "").split(",") if url.strip()]
 
 
 class DbConfig:
     """Base SQLAlchemy props"""
 
-    SQLALCHEMY_POOL_CLASS = QueuePool
     SQLALCHEMY_TIMEZONE = "UTC"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # pool of each engine, read from env by every config
+    SQLALCHEMY_ENGINE_OPTIONS = PoolConfig().get_engine_options()
+    # read replicas, GET reads use them and writes stay on the primary
+    SQLALCHEMY_REPLICA_URIS: list[str] = []
+    # seconds the reads of a table stay on the primary after a write
+    REPLICA_STICKY_TIMEOUT = 5
+    # seconds between health checks of each replica
+    REPLICA_CHECK_INTERVAL = 10
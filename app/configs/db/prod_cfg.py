@@ -2,7 +2,11 @@
 
 import os
 
-from app.configs.db.database_cfg import DbConfig
+from app.configs.db.database_cfg import (
+    DbConfig,
+    get_pool_config,
+    get_replica_uris,
+)
 import app.const as consts
 
 
@@ -10,6 +14,8 @@ class ProdConfig(DbConfig):
     """Prod config inherits from DbConfig and use environment variables"""
 
     SQLALCHEMY_DATABASE_URI = os.getenv(consts.envs.CANDC_DB_URL)
-    # close idle connections after POOL_RECYCLE seconds
-    SQLALCHEMY_POOL_RECYCLE = os.getenv(consts.envs.POOL_RECYCLE)
-    SQLALCHEMY_POOL_SIZE = os.getenv(consts.envs.POOL_SIZE)
+    SQLALCHEMY_REPLICA_URIS = get_replica_uris(
+        os.getenv(consts.envs.CANDC_DB_REPLICA_URLS)
+    )
+    # pool settings, the app does not start if any is not valid
+    SQLALCHEMY_ENGINE_OPTIONS = get_pool_config(os.environ).get_engine_options()
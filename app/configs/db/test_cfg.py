@@ -2,7 +2,11 @@
 
 from dotenv import dotenv_values, find_dotenv
 
-from app.configs.db.database_cfg import DbConfig
+from app.configs.db.database_cfg import (
+    DbConfig,
+    get_pool_config,
+    get_replica_uris,
+)
 import app.const as consts
 
 
@@ -16,5 +20,8 @@ class TestConfig(DbConfig):
     env_file = find_dotenv(".env.test")
     config = dotenv_values(env_file)
     SQLALCHEMY_DATABASE_URI = config[consts.envs.CANDC_DB_URL]
-    SQLALCHEMY_POOL_RECYCLE = config[consts.envs.POOL_RECYCLE]
-    SQLALCHEMY_POOL_SIZE = config[consts.envs.POOL_SIZE]
+    SQLALCHEMY_REPLICA_URIS = get_replica_uris(
+        config.get(consts.envs.CANDC_DB_REPLICA_URLS)
+    )
+    # pool settings, the app does not start if any is not valid
+    SQLALCHEMY_ENGINE_OPTIONS = get_pool_config(config).get_engine_options()
@@ -3,7 +3,27 @@
 from typing import Final
 
 
+CACHE_DIR: Final[str] = "CACHE_DIR"
+CACHE_L1_MAX_BYTES: Final[str] = "CACHE_L1_MAX_BYTES"
+CACHE_L1_MAX_ENTRIES: Final[str] = "CACHE_L1_MAX_ENTRIES"
+CACHE_L2_TYPE: Final[str] = "CACHE_L2_TYPE"
+CACHE_LOCK_MODE: Final[str] = "CACHE_LOCK_MODE"
+CACHE_LOCK_TIMEOUT: Final[str] = "CACHE_LOCK_TIMEOUT"
+CACHE_MAX_BYTES: Final[str] = "CACHE_MAX_BYTES"
+CACHE_MAX_FILTERS: Final[str] = "CACHE_MAX_FILTERS"
+CACHE_NEGATIVE_TIMEOUT: Final[str] = "CACHE_NEGATIVE_TIMEOUT"
+CACHE_POLICIES: Final[str] = "CACHE_POLICIES"
+CACHE_REDIS_URL: Final[str] = "CACHE_REDIS_URL"
+CACHE_SOFT_TIMEOUT: Final[str] = "CACHE_SOFT_TIMEOUT"
+CACHE_THRESHOLD: Final[str] = "CACHE_THRESHOLD"
+CACHE_TYPE: Final[str] = "CACHE_TYPE"
+CACHE_WARMUP: Final[str] = "CACHE_WARMUP"
+CACHE_WARMUP_WORKERS: Final[str] = "CACHE_WARMUP_WORKERS"
+CANDC_DB_REPLICA_URLS: Final[str] = "CANDC_DB_REPLICA_URLS"
 CANDC_DB_URL: Final[str] = "CANDC_DB_URL"
 CANDC_ENV: Final[str] = "CANDC_ENV"
+POOL_MAX_OVERFLOW: Final[str] = "POOL_MAX_OVERFLOW"
+POOL_PRE_PING: Final[str] = "POOL_PRE_PING"
 POOL_RECYCLE: Final[str] = "POOL_RECYCLE"
 POOL_SIZE: Final[str] = "POOL_SIZE"
+POOL_TIMEOUT: Final[str] = "POOL_TIMEOUT"
@@ -0,0 +1,428 @@
+"""Custom cache backends to be used through CACHE_TYPE"""
+
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+import fcntl
+import logging
+import math
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Any, Final
+
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.filesystemcache import FileSystemCache
+from flask_caching.backends.memcache import (
+    MemcachedCache,
+    SASLMemcachedCache,
+    SpreadSASLMemcachedCache,
+)
+from flask_caching.backends.rediscache import (
+    RedisCache,
+    RedisClusterCache,
+    RedisSentinelCache,
+)
+from werkzeug.utils import import_string
+
+from app.configs.log_cfg import LOG_NAME
+from app.core.cache_stats import app_cache_stats, get_stats_namespace
+
+
+log = logging.getLogger(LOG_NAME)
+CHANNEL_SEQUENCE_KEY: Final[str] = "__l1:seq__"
+CHANNEL_MESSAGE_KEY: Final[str] = "__l1:msg:{}__"
+CHANNEL_MESSAGE_TIMEOUT: Final[int] = 300
+CLEAR_ALL: Final[str] = "__l1:clear__"
+
+
+class LruCache(BaseCache):
+    """
+    In-process cache that evicts the least recently used entries
+    once it holds more than max_entries or max_bytes (0 means no byte limit).
+    Values are pickled on set, so the size of each entry is known
+    and callers never share mutable objects with the cache.
+    """
+
+    def __init__(
+        self, max_entries: int = 500, max_bytes: int = 0, default_timeout: int = 300
+    ) -> None:
+        super().__init__(default_timeout=default_timeout)  # type: ignore[no-untyped-call]
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self.current_bytes = 0
+        self.evictions = 0
+        self._cache: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):  # type: ignore[no-untyped-def]
+        kwargs.update(
+            {
+                "max_entries": config["CACHE_THRESHOLD"],
+                "max_bytes": config["CACHE_MAX_BYTES"],
+            }
+        )
+        return cls(*args, **kwargs)
+
+    @staticmethod
+    def _get_size(key: str, data: bytes) -> int:
+        return len(key) + len(data)
+
+    def _get_expiration(self, timeout: int | None) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return 0 if timeout == 0 else time.time() + timeout
+
+    def _remove(self, key: str) -> bool:
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return False
+        self.current_bytes -= LruCache._get_size(key, entry[1])
+        return True
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until both limits are met"""
+        while len(self._cache) > self._max_entries or (
+            self._max_bytes and self.current_bytes > self._max_bytes
+        ):
+            key = next(iter(self._cache))
+            self._remove(key)
+            self.evictions += 1
+            app_cache_stats.incr(get_stats_namespace(key), "evictions")
+
+    def _get_data(self, key: str) -> bytes | None:
+        """Raw value of a live entry, it marks the entry as recently used"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires != 0 and expires <= time.time():
+                self._remove(key)
+                return None
+            self._cache.move_to_end(key)
+            return data
+
+    def get(self, key: str) -> Any:
+        data = self._get_data(key)
+        return None if data is None else pickle.loads(data)
+
+    def set(self, key: str, value: Any, timeout: int | None = None) -> bool:
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        size = LruCache._get_size(key, data)
+        with self._lock:
+            self._remove(key)
+            if self._max_bytes and size > self._max_bytes:
+                log.warning("Entry %s does not fit in cache, %s bytes", key, size)
+                return False
+            self._cache[key] = (self._get_expiration(timeout), data)
+            self.current_bytes += size
+            self._evict()
+        return True
+
+    def add(self, key: str, value: Any, timeout: int | None = None) -> bool:
+        with self._lock:
+            if self.has(key):
+                return False
+            return self.set(key, value, timeout)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def has(self, key: str) -> bool:
+        return self._get_data(key) is not None
+
+    def clear(self) -> bool:
+        with self._lock:
+            self._cache.clear()
+            self.current_bytes = 0
+        return True
+
+    def inc(self, key: str, delta: int = 1) -> int | None:
+        """Increment a counter, an existing one keeps its expiration"""
+        with self._lock:
+            data = self._get_data(key)
+            if data is None:
+                self.set(key, delta)
+                return delta
+            expires = self._cache[key][0]
+            timeout = 0 if expires == 0 else max(1, math.ceil(expires - time.time()))
+            value = int(pickle.loads(data)) + delta
+            self.set(key, value, timeout)
+            return value
+
+
+class AtomicFileSystemCache(FileSystemCache):
+    """
+    FileSystemCache shared by the workers of a host. Its add and inc hold
+    a file lock, so two workers never read the same counter value or both
+    add the same key. The lock file sits next to cache_dir, a clear of
+    the cache never removes it.
+    """
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        lock_path = f"{os.path.normpath(self._path)}.lock"
+        with open(lock_path, "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add(self, key: str, value: Any, timeout: int | None = None) -> bool:
+        with self._lock():
+            if self.has(key):
+                return False
+            return bool(self.set(key, value, timeout))
+
+    def _get_timeout(self, key: str) -> int | None:
+        """Seconds left for a live entry (0 never expires), None if missing"""
+        try:
+            with open(self._get_filename(key), "rb") as entry_file:
+                expires = int(struct.unpack("I", entry_file.read(4))[0])
+        except (OSError, struct.error):
+            return None
+        if expires == 0:
+            return 0
+        return max(1, expires - int(time.time()))
+
+    def inc(self, key: str, delta: int = 1) -> int | None:
+        """Increment a counter, an existing one keeps its expiration"""
+        with self._lock():
+            current = self.get(key)
+            timeout = None if current is None else self._get_timeout(key)
+            value = int(current or 0) + delta
+            return value if self.set(key, value, timeout) else None
+
+
+# backends shared by the workers, their add and inc are atomic
+ATOMIC_SHARED_BACKENDS: Final[tuple[type[BaseCache], ...]] = (
+    AtomicFileSystemCache,
+    MemcachedCache,
+    SASLMemcachedCache,
+    SpreadSASLMemcachedCache,
+    RedisCache,
+    RedisClusterCache,
+    RedisSentinelCache,
+)
+
+
+def is_shared_backend(backend: BaseCache) -> bool:
+    """
+    If the workers share the entries of a backend and its counters.
+    In-process backends are not shared, and a backend like FileSystemCache
+    runs inc as a get and a set, so two workers may get the same value.
+    """
+    return isinstance(backend, (TieredCache, *ATOMIC_SHARED_BACKENDS))
+
+
+def keeps_timeout_on_inc(backend: BaseCache) -> bool:
+    """
+    If inc of a backend keeps the expiration of the counter. Backends like
+    SimpleCache run inc as a get and a set with the default timeout.
+    """
+    return isinstance(backend, (LruCache, TieredCache, *ATOMIC_SHARED_BACKENDS))
+
+
+class InvalidationChannel:
+    """
+    Broadcast invalidated keys to every worker through the shared backend.
+    Each message is stored under a sequence number, so a worker only
+    reads the messages published after its last poll.
+    """
+
+    def __init__(self, backend: BaseCache, max_pending: int = 1000) -> None:
+        self.backend = backend
+        self.max_pending = max_pending
+        self.last_sequence = self._get_sequence()
+
+    def _get_sequence(self) -> int:
+        return int(self.backend.get(CHANNEL_SEQUENCE_KEY) or 0)
+
+    def publish(self, keys: list[str] | None) -> None:
+        """Send the invalidated keys, None means the whole cache was cleared"""
+        if self.backend.get(CHANNEL_SEQUENCE_KEY) is None:
+            self.backend.add(CHANNEL_SEQUENCE_KEY, 0, timeout=0)
+        sequence = self.backend.inc(CHANNEL_SEQUENCE_KEY)
+        if sequence is not None:
+            self.backend.set(
+                CHANNEL_MESSAGE_KEY.format(sequence),
+                keys or CLEAR_ALL,
+                timeout=CHANNEL_MESSAGE_TIMEOUT,
+            )
+
+    def poll(self) -> list[str] | None:
+        """
+        Keys invalidated since the last poll,
+        None when the worker must drop everything
+        """
+        sequence = self._get_sequence()
+        if sequence == self.last_sequence:
+            return []
+        if sequence < self.last_sequence:
+            # the shared backend lost the sequence, nothing can be trusted
+            self.last_sequence = sequence
+            return None
+        pending = range(self.last_sequence + 1, sequence + 1)
+        self.last_sequence = sequence
+        if len(pending) > self.max_pending:
+            return None
+        messages = self.backend.get_many(
+            *[CHANNEL_MESSAGE_KEY.format(number) for number in pending]
+        )
+        keys: list[str] = []
+        for message in messages:
+            # a missing message could not be read, so act as a clear
+            if message is None or message == CLEAR_ALL:
+                return None
+            keys.extend(message)
+        return keys
+
+
+class TieredCache(BaseCache):
+    """
+    Two level cache: a per-worker LruCache (L1) in front of a
+    shared backend (L2) like Redis or AtomicFileSystemCache.
+    Invalidations are broadcast, so every worker drops its L1 copies.
+    """
+
+    def __init__(
+        self,
+        l1: BaseCache,
+        l2: BaseCache,
+        channel: InvalidationChannel,
+        l1_timeout: int = 300,
+        sync_interval: float = 0.5,
+        default_timeout: int = 300,
+    ) -> None:
+        if not is_shared_backend(l2):
+            raise ValueError(
+                f"CACHE_L2_TYPE needs atomic add and inc, got {type(l2).__name__}, "
+                "use RedisCache or app.core.cache_backends.AtomicFileSystemCache"
+            )
+        super().__init__(default_timeout=default_timeout)  # type: ignore[no-untyped-call]
+        self.l1 = l1
+        self.l2 = l2
+        self.channel = channel
+        self.l1_timeout = l1_timeout
+        self.sync_interval = sync_interval
+        self._last_sync = time.monotonic()
+        self._sync_lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):  # type: ignore[no-untyped-def]
+        l2_type = config["CACHE_L2_TYPE"]
+        if "." not in l2_type:
+            l2_type = f"flask_caching.backends.{l2_type}"
+        l2 = import_string(l2_type).factory(app, config, [], dict(kwargs))
+        l1 = LruCache(
+            max_entries=config["CACHE_L1_MAX_ENTRIES"],
+            max_bytes=config["CACHE_L1_MAX_BYTES"],
+        )
+        return cls(
+            l1,
+            l2,
+            InvalidationChannel(l2),
+            l1_timeout=config["CACHE_L1_TIMEOUT"],
+            sync_interval=config["CACHE_L1_SYNC_INTERVAL"],
+            **kwargs,
+        )
+
+    @property
+    def _cache(self) -> Any:
+        """Entries held by the L1 of this worker"""
+        return getattr(self.l1, "_cache", {})
+
+    @property
+    def evictions(self) -> int | None:
+        """Entries evicted from the L1 of this worker"""
+        return getattr(self.l1, "evictions", None)
+
+    def _get_l1_timeout(self, timeout: int | None) -> int:
+        timeout = self._normalize_timeout(timeout)
+        return self.l1_timeout if timeout == 0 else min(timeout, self.l1_timeout)
+
+    def _sync(self) -> None:
+        """Drop the L1 entries invalidated by any worker"""
+        if time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        with self._sync_lock:
+            self._last_sync = time.monotonic()
+            keys = self.channel.poll()
+        if keys is None:
+            log.debug("Clearing L1 cache after broadcast")
+            self.l1.clear()
+            return
+        for key in keys:
+            self.l1.delete(key)
+
+    def get(self, key: str) -> Any:
+        self._sync()
+        value = self.l1.get(key)
+        if value is None:
+            value = self.l2.get(key)
+            if value is not None:
+                self.l1.set(key, value, timeout=self.l1_timeout)
+        return value
+
+    def get_many(self, *keys: str) -> list[Any]:
+        self._sync()
+        values = [self.l1.get(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            l2_values = self.l2.get_many(*[keys[index] for index in missing])
+            for index, value in zip(missing, l2_values):
+                if value is not None:
+                    values[index] = value
+                    self.l1.set(keys[index], value, timeout=self.l1_timeout)
+        return values
+
+    def set(self, key: str, value: Any, timeout: int | None = None) -> bool:
+        result = bool(self.l2.set(key, value, timeout=timeout))
+        if result:
+            self.l1.set(key, value, timeout=self._get_l1_timeout(timeout))
+        return result
+
+    def add(self, key: str, value: Any, timeout: int | None = None) -> bool:
+        self.l1.delete(key)
+        return bool(self.l2.add(key, value, timeout=timeout))
+
+    def delete(self, key: str) -> bool:
+        self.l1.delete(key)
+        result = bool(self.l2.delete(key))
+        self.channel.publish([key])
+        return result
+
+    def has(self, key: str) -> bool:
+        self._sync()
+        return bool(self.l1.has(key) or self.l2.has(key))
+
+    def clear(self) -> bool:
+        self.l1.clear()
+        # keep the channel sequence, other workers must see the clear message
+        sequence = self.l2.get(CHANNEL_SEQUENCE_KEY)
+        result = bool(self.l2.clear())
+        if sequence is not None:
+            self.l2.set(CHANNEL_SEQUENCE_KEY, sequence, timeout=0)
+        self.channel.publish(None)
+        return result
+
+    def inc(self, key: str, delta: int = 1) -> int | None:
+        self.l1.delete(key)
+        value = self.l2.inc(key, delta=delta)
+        self.channel.publish([key])
+        return value
+
+    def inc_many(self, *keys: str, delta: int = 1) -> list[int | None]:
+        """Increment several counters, the workers get a single message"""
+        values = []
+        for key in keys:
+            self.l1.delete(key)
+            values.append(self.l2.inc(key, delta=delta))
+        if keys:
+            self.channel.publish(list(keys))
+        return values
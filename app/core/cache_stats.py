@@ -0,0 +1,95 @@
+"""Init cache stats globally to be used across the app"""
+
+from collections import defaultdict
+import itertools
+import re
+import threading
+import weakref
+
+
+def get_stats_namespace(cache_key: str) -> str:
+    """
+    Namespace used to group the stats of a key,
+    the entries of every row are grouped under their model namespace
+    """
+    return re.sub(r"-\d+$", "", cache_key.split(":", 1)[0])
+
+
+Counters = dict[str, dict[str, float]]
+
+
+def _merge_counters(target: Counters, counters: Counters) -> None:
+    """Add counters into target, the *_max ones keep the max value"""
+    for namespace, values in dict(counters).items():
+        target_values = target.setdefault(namespace, {})
+        for name, value in dict(values).items():
+            if name.endswith("_max"):
+                target_values[name] = max(target_values.get(name, 0), value)
+            else:
+                target_values[name] = target_values.get(name, 0) + value
+
+
+class _ThreadCounters:
+    """Counters of a single thread, dropped with the thread locals"""
+
+    __slots__ = ("counters", "__weakref__")
+
+    def __init__(self) -> None:
+        self.counters: Counters = defaultdict(lambda: defaultdict(float))
+
+
+class CacheStats:
+    """
+    Counters by cache namespace. Each thread writes its own counters
+    without locking, they are only aggregated when stats are read.
+    The counters of a finished thread are folded into a shared total,
+    so short lived threads (refreshes, dev server requests) don't pile up.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._live_counters: dict[int, Counters] = {}
+        self._finished_counters: Counters = {}
+        self._next_token = itertools.count()
+        self._lock = threading.Lock()
+
+    def _get_counters(self) -> Counters:
+        thread_counters = getattr(self._local, "thread_counters", None)
+        if thread_counters is None:
+            thread_counters = _ThreadCounters()
+            self._local.thread_counters = thread_counters
+            token = next(self._next_token)
+            with self._lock:
+                self._live_counters[token] = thread_counters.counters
+            # runs once the thread ends and its locals are released
+            weakref.finalize(thread_counters, self._fold_counters, token)
+        return thread_counters.counters
+
+    def _fold_counters(self, token: int) -> None:
+        """Move the counters of a finished thread into the shared total"""
+        with self._lock:
+            counters = self._live_counters.pop(token, None)
+            if counters is not None:
+                _merge_counters(self._finished_counters, counters)
+
+    def incr(self, namespace: str, name: str, value: float = 1) -> None:
+        """Add value to a counter of the namespace"""
+        self._get_counters()[namespace][name] += value
+
+    def observe_max(self, namespace: str, name: str, value: float) -> None:
+        """Keep the max value seen for a counter of the namespace"""
+        counters = self._get_counters()[namespace]
+        counters[name] = max(counters[name], value)
+
+    def get_counters(self) -> Counters:
+        """Aggregate the counters of every thread"""
+        result: Counters = {}
+        with self._lock:
+            _merge_counters(result, self._finished_counters)
+            all_counters = list(self._live_counters.values())
+        for counters in all_counters:
+            _merge_counters(result, counters)
+        return result
+
+
+app_cache_stats = CacheStats()
@@ -0,0 +1,34 @@
+"""Flask cli commands"""
+
+from typing import Any
+
+import click
+from flask import Flask, current_app
+from flask.cli import AppGroup
+
+from app.routes.models.crud import cache_warmers
+from app.service.warmup_service import CacheWarmupService
+
+
+cache_cli = AppGroup("cache", help="App cache commands")
+
+
+def warm_app_cache(app: Flask) -> dict[str, Any]:
+    """Load the list of every crud route and the money options of each faction"""
+    warmup_service = CacheWarmupService(app.config["CACHE_WARMUP_WORKERS"])
+    with app.app_context():
+        loaders = {**cache_warmers, **warmup_service.get_money_loaders()}
+    return warmup_service.warm(app, loaders)
+
+
+@cache_cli.command("warm")
+def warm_command() -> None:
+    """Pre-populate the cache"""
+    app: Flask = current_app._get_current_object()  # type: ignore[attr-defined]
+    result = warm_app_cache(app)
+    click.echo(
+        f"Loaded {result['loaded']} entries in {result['elapsed_ms']} ms, "
+        f"{len(result['failed'])} failed"
+    )
+    for name in result["failed"]:
+        click.echo(f"Failed: {name}")
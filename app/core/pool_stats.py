@@ -0,0 +1,136 @@
+"""Init db connection pool stats globally to be used across the app"""
+
+from collections.abc import Mapping
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import ConnectionPoolEntry, Pool, QueuePool
+
+from app.configs.log_cfg import LOG_NAME
+from app.core.cache_stats import CacheStats
+
+
+log = logging.getLogger(LOG_NAME)
+
+
+class PoolStats:
+    """
+    Checkouts, wait and connect times of the connection pool of each engine,
+    by engine name. Counters are kept by thread like CacheStats, the pool
+    state (checked out, overflow) is read live from the pools.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._counters = CacheStats()
+
+    def start_checkout(self) -> None:
+        """Forget the connect time of the last checkout of this thread"""
+        self._local.connect_seconds = 0.0
+
+    def observe_checkout(self, name: str, seconds: float) -> None:
+        """Count a checkout, the time spent opening a connection is not waiting"""
+        wait = max(seconds - getattr(self._local, "connect_seconds", 0.0), 0.0)
+        self._counters.incr(name, "checkouts")
+        self._counters.incr(name, "wait_time", wait)
+        self._counters.observe_max(name, "wait_time_max", wait)
+
+    def observe_timeout(self, name: str, pool: Pool) -> None:
+        """Count a checkout that gave up waiting for a connection"""
+        log.warning(
+            "Pool %s timed out waiting for a connection: %s", name, pool.status()
+        )
+        self._counters.incr(name, "timeouts")
+
+    def observe_connect(self, name: str, seconds: float, pool: Pool) -> None:
+        """Count a new db connection and the time it took"""
+        self._local.connect_seconds = seconds
+        self._counters.incr(name, "connects")
+        self._counters.incr(name, "connect_time", seconds)
+        self._counters.observe_max(name, "connect_time_max", seconds)
+        log.info(
+            "Pool %s connected in %.1f ms: %s", name, seconds * 1000, pool.status()
+        )
+
+    def watch(self, engine: Engine, name: str) -> None:
+        """Record the stats of the engine pool under the given name"""
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.stats_name = name
+
+        def do_connect(*args: Any) -> None:
+            self._local.connect_start = time.perf_counter()
+
+        def connect(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+            start = getattr(self._local, "connect_start", None)
+            if start is not None:
+                self._local.connect_start = None
+                self.observe_connect(name, time.perf_counter() - start, engine.pool)
+
+        event.listen(engine, "do_connect", do_connect)
+        event.listen(engine, "connect", connect)
+
+    def get_stats(self, engines: Mapping[str, Engine]) -> dict[str, dict[str, Any]]:
+        """Live state and counters of the pool of each engine by name"""
+        counters = self._counters.get_counters()
+        stats = {}
+        for name, engine in engines.items():
+            pool = engine.pool
+            values = counters.get(name, {})
+            checkouts = values.get("checkouts", 0)
+            connects = values.get("connects", 0)
+            # other pools like StaticPool do not count their connections
+            live = (
+                {
+                    "size": pool.size(),
+                    "checked_in": pool.checkedin(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": pool.overflow(),
+                }
+                if isinstance(pool, QueuePool)
+                else {}
+            )
+            stats[name] = {
+                **live,
+                "checkouts": int(checkouts),
+                "timeouts": int(values.get("timeouts", 0)),
+                "wait_ms_avg": _get_avg_ms(values.get("wait_time", 0), checkouts),
+                "wait_ms_max": round(values.get("wait_time_max", 0) * 1000, 3),
+                "connects": int(connects),
+                "connect_ms_avg": _get_avg_ms(values.get("connect_time", 0), connects),
+                "connect_ms_max": round(values.get("connect_time_max", 0) * 1000, 3),
+            }
+        return stats
+
+
+def _get_avg_ms(seconds: float, count: float) -> float:
+    return round(seconds * 1000 / count, 3) if count else 0.0
+
+
+app_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    stats_name = "primary"
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        app_pool_stats.start_checkout()
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except PoolTimeoutError:
+            app_pool_stats.observe_timeout(self.stats_name, self)
+            raise
+        app_pool_stats.observe_checkout(self.stats_name, time.perf_counter() - start)
+        return entry
+
+    def recreate(self) -> QueuePool:
+        # dispose() replaces the pool, keep its name
+        pool = super().recreate()
+        pool.stats_name = self.stats_name  # type: ignore[attr-defined]
+        return pool
@@ -0,0 +1,172 @@
+"""Route the reads to the db replicas, the writes stay on the primary"""
+
+from collections.abc import Iterable
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Final
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import Engine, create_engine, event, text
+from sqlalchemy.engine import ExceptionContext
+
+from app.configs.log_cfg import LOG_NAME
+from app.core.cache import app_cache
+from app.core.cache_backends import is_shared_backend
+
+
+log = logging.getLogger(LOG_NAME)
+EXTENSION_NAME: Final[str] = "candc_replicas"
+# execution option of the statements that may be read from a replica
+REPLICA_OPTION: Final[str] = "candc_replica"
+PRIMARY_KEY: Final[str] = "primary"
+
+
+def get_primary_key(table: str) -> str:
+    """Cache key that sends the reads of a table to the primary, e.g. boat:primary"""
+    return f"{table}:{PRIMARY_KEY}"
+
+
+class Replica:
+    """A replica engine and the result of its last health check"""
+
+    def __init__(self, name: str, engine: Engine) -> None:
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.checked_at = time.monotonic()
+
+
+class ReplicaPool:
+    """Replicas of an app, handed out round robin while they are healthy"""
+
+    def __init__(
+        self, replicas: list[Replica], check_interval: float, sticky_timeout: int
+    ) -> None:
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.sticky_timeout = sticky_timeout
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def check(self, replica: Replica) -> bool:
+        """Run the health check of a replica, a failed one is ejected"""
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            healthy = True
+        except Exception:  # pylint: disable=broad-exception-caught
+            log.warning("Replica %s failed its health check", replica.name)
+            healthy = False
+        replica.healthy = healthy
+        replica.checked_at = time.monotonic()
+        return healthy
+
+    def eject(self, replica: Replica) -> None:
+        """Stop reading from a replica until its next health check"""
+        log.warning("Replica %s ejected after a db error", replica.name)
+        replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    def next_healthy(self) -> Replica | None:
+        """Next healthy replica, the ones due are checked again first"""
+        with self._lock:
+            start = next(self._next)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if time.monotonic() - replica.checked_at >= self.check_interval:
+                self.check(replica)
+            if replica.healthy:
+                return replica
+        return None
+
+
+class ReplicaRouter:
+    """
+    Send the reads to the replicas of SQLALCHEMY_REPLICA_URIS.
+    After a write the reads of its table go to the primary for
+    REPLICA_STICKY_TIMEOUT seconds, the mark is kept in the shared app
+    cache so every worker sees it. Without replicas everything uses the primary.
+    """
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Create an engine per replica uri. The marks of the tables just
+        written are kept in the app cache, every worker should see them,
+        so replicas need a backend shared by the workers.
+        """
+        options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        uris = app.config.get("SQLALCHEMY_REPLICA_URIS", [])
+        if uris and not is_shared_backend(app.extensions["cache"][app_cache]):
+            raise ValueError(
+                "Read replicas need a CACHE_TYPE shared by the workers, "
+                "like app.core.cache_backends.TieredCache or RedisCache"
+            )
+        replicas = []
+        for index, uri in enumerate(uris):
+            replica = Replica(f"replica-{index}", create_engine(uri, **options))
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+            replicas.append(replica)
+        app.extensions[EXTENSION_NAME] = ReplicaPool(
+            replicas,
+            app.config["REPLICA_CHECK_INTERVAL"],
+            app.config["REPLICA_STICKY_TIMEOUT"],
+        )
+
+    @staticmethod
+    def _get_pool() -> ReplicaPool | None:
+        """Replicas of the running app, None if there is none"""
+        if not has_app_context():
+            return None
+        pool = current_app.extensions.get(EXTENSION_NAME)
+        return pool if pool is not None and pool.replicas else None
+
+    def _on_error(self, replica: Replica) -> Any:
+        def handle_error(context: ExceptionContext) -> None:
+            if context.is_disconnect or context.connection is None:
+                pool = ReplicaRouter._get_pool()
+                if pool is not None:
+                    pool.eject(replica)
+
+        return handle_error
+
+    def get_read_engine(self, tables: Iterable[str]) -> Engine | None:
+        """
+        Engine of a healthy replica to read the tables.
+            Args:
+                tables (Iterable): names of the tables the read uses.
+            Returns:
+                Engine: replica engine, None to read from the primary
+        """
+        pool = ReplicaRouter._get_pool()
+        if pool is None:
+            return None
+        primary_keys = [get_primary_key(table) for table in tables]
+        if any(app_cache.cache.get_many(*primary_keys)):
+            return None
+        replica = pool.next_healthy()
+        return None if replica is None else replica.engine
+
+    def stick_to_primary(self, table: str) -> None:
+        """Read a table from the primary for a while, it was just written"""
+        pool = ReplicaRouter._get_pool()
+        if pool is not None:
+            app_cache.set(get_primary_key(table), 1, timeout=pool.sticky_timeout)
+
+    def get_engines(self) -> dict[str, Engine]:
+        """Engine of each replica by name"""
+        pool = ReplicaRouter._get_pool()
+        if pool is None:
+            return {}
+        return {replica.name: replica.engine for replica in pool.replicas}
+
+    def get_status(self) -> dict[str, bool]:
+        """Health of each replica by name"""
+        pool = ReplicaRouter._get_pool()
+        if pool is None:
+            return {}
+        return {replica.name: replica.healthy for replica in pool.replicas}
+
+
+app_replicas = ReplicaRouter()
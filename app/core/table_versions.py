@@ -0,0 +1,49 @@
+"""Version counter by table, shared by the workers through the app cache"""
+
+import time
+from typing import Final, cast
+
+from flask_caching.backends.base import BaseCache
+
+from app.core.cache import app_cache
+from app.core.cache_backends import is_shared_backend
+
+
+VERSION_KEY: Final[str] = "version"
+
+
+def has_shared_versions() -> bool:
+    """
+    If every worker sees the same versions. A cache of each worker
+    would keep the version of the tables it did not write.
+    """
+    return is_shared_backend(app_cache.cache)
+
+
+def get_versions_cache() -> BaseCache:
+    """
+    Cache holding the versions. A tiered cache is read from its shared
+    level, its local one would keep a version until the next sync.
+    """
+    backend = app_cache.cache
+    return cast(BaseCache, getattr(backend, "l2", backend))
+
+
+def get_table_version(table: str) -> int:
+    """
+    Current version of a table. A missing counter is seeded with
+    the current time, so after an eviction it never goes back.
+    """
+    versions = get_versions_cache()
+    version_key = f"{table}:{VERSION_KEY}"
+    version = versions.get(version_key)
+    if version is None:
+        versions.add(version_key, time.time_ns(), timeout=0)
+        version = versions.get(version_key)
+    return int(version or 0)
+
+
+def bump_table_version(table: str) -> None:
+    """Move the version of a table forward after a write"""
+    get_table_version(table)
+    get_versions_cache().inc(f"{table}:{VERSION_KEY}")
@@ -0,0 +1,57 @@
+"""Init db write stats globally to be used across the app"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import logging
+import threading
+from typing import Any
+
+from app.configs.log_cfg import LOG_NAME
+from app.core.cache_stats import CacheStats
+
+
+log = logging.getLogger(LOG_NAME)
+
+
+class WriteStats:
+    """
+    Round trips sent to the db by each kind of write, by table.
+    Statements are counted by thread, so the writes of
+    concurrent requests are not mixed up.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._counters = CacheStats()
+
+    def count_round_trip(self) -> None:
+        """Count a statement sent by this thread"""
+        self._local.round_trips = getattr(self._local, "round_trips", 0) + 1
+
+    @contextmanager
+    def track(self, table: str, operation: str) -> Iterator[None]:
+        """Count the round trips of the write run in the block"""
+        start = getattr(self._local, "round_trips", 0)
+        yield
+        round_trips = getattr(self._local, "round_trips", 0) - start
+        log.debug("%s of %s took %s round trips", operation, table, round_trips)
+        self._counters.incr(table, operation)
+        self._counters.incr(table, f"{operation}_round_trips", round_trips)
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """Writes and round trips per write by table and operation"""
+        stats: dict[str, dict[str, Any]] = {}
+        for table, values in sorted(self._counters.get_counters().items()):
+            stats[table] = {}
+            for operation, count in values.items():
+                if not operation.endswith("_round_trips"):
+                    round_trips = values.get(f"{operation}_round_trips", 0)
+                    stats[table][operation] = {
+                        "writes": int(count),
+                        "round_trips": int(round_trips),
+                        "round_trips_avg": round(round_trips / count, 3),
+                    }
+        return stats
+
+
+app_write_stats = WriteStats()
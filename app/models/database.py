@@ -1,26 +1,155 @@
 """db and crud module"""
 
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
 from datetime import datetime, timezone
+import logging
 from typing import Any, Final
 
+from sqlalchemy import Engine, Row, delete as sql_delete, insert, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.util import find_tables
 from sqlmodel import SQLModel
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
 
+from app.configs.log_cfg import LOG_NAME
+from app.core.replicas import PRIMARY_KEY, REPLICA_OPTION, app_replicas
+from app.core.table_versions import bump_table_version
+from app.core.write_stats import app_write_stats
 from app.error.custom_exc import BadArgException, UnpatchableFieldException
+from app.models.filters import compile_filters, parse_filters
+from app.models.models import get_table
 
 
+log = logging.getLogger(LOG_NAME)
 NON_UPDATABLE_FIELDS: Final[list[str]] = ["created_at", "updated_at"]
-db = SQLAlchemy()
+# options of the statements run by GET paths, they never need a flush
+# and they may be sent to a replica
+READ_OPTIONS: Final[dict[str, Any]] = {"autoflush": False, REPLICA_OPTION: True}
 
 
-def get_all(model: type[SQLModel]) -> list[type[SQLModel]]:
-    """Fetch all active data"""
-    session = db.session()
-    return session.query(model).filter_by(active=True).all()
+class RoutingSession(FlaskSession):
+    """
+    Session that sends the statements run with READ_OPTIONS to a replica.
+    A read that fails on a replica is run again on the primary.
+    """
+
+    _read_replica: Any = None
+
+    def get_bind(
+        self, mapper: Any = None, clause: Any = None, bind: Any = None, **kwargs: Any
+    ) -> Any:
+        if (
+            bind is None
+            and clause is not None
+            and clause._execution_options.get(REPLICA_OPTION)
+        ):
+            tables = {table.name for table in find_tables(clause)}
+            replica = app_replicas.get_read_engine(tables)
+            if replica is not None:
+                self._read_replica = replica
+                return replica
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+    def execute(
+        self,
+        statement: Any,
+        params: Any = None,
+        *,
+        bind_arguments: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        self._read_replica = None
+        try:
+            return super().execute(
+                statement, params, bind_arguments=bind_arguments, **kwargs
+            )
+        except DBAPIError:
+            if self._read_replica is None:
+                raise
+            log.warning("Read failed on a replica, running it on the primary")
+            self._read_replica = None
+            primary = super().get_bind(clause=statement)
+            return super().execute(
+                statement,
+                params,
+                bind_arguments={**(bind_arguments or {}), "bind": primary},
+                **kwargs,
+            )
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def get_engines() -> dict[str, Engine]:
+    """Primary and replica engines of the app by name"""
+    return {PRIMARY_KEY: db.engine, **app_replicas.get_engines()}
+
+
+def read_query(
+    model: type[SQLModel], fields: Sequence[str] | None = None
+) -> Query[Any]:
+    """
+    Query used by the reads, it returns plain rows of the given columns or
+    of every column. Rows skip the identity map, the unit of work and the
+    expire on commit of the session, and the session is not flushed.
+    """
+    columns = get_table(model).columns
+    entities = columns if fields is None else [columns[field] for field in fields]
+    query: Query[Any] = db.session().query(*entities)
+    return query.execution_options(**READ_OPTIONS)
+
+
+def get_all(
+    model: type[SQLModel], fields: Sequence[str] | None = None
+) -> list[Row[Any]]:
+    """Fetch all active data as rows, only the given fields if set"""
+    return read_query(model, fields).filter_by(active=True).all()
+
 
+def get_page(
+    model: type[SQLModel],
+    limit: int,
+    after: int | None = None,
+    fields: Sequence[str] | None = None,
+) -> list[Row[Any]]:
+    """Fetch a page of active data as rows, ordered by primary key"""
+    query = read_query(model, fields).filter_by(active=True)
+    return _get_page_query(model, query, limit, after).all()
 
-def get_by_id(model: type[SQLModel], data_id: int) -> type[SQLModel] | None:
-    """Fetch data by id"""
+
+def _get_page_query(
+    model: type[SQLModel], query: Query[Any], limit: int | None, after: int | None
+) -> Query[Any]:
+    """
+    Keyset page: rows after the given primary key, so the db
+    reads an index range instead of skipping rows with OFFSET
+    """
+    if limit is None:
+        return query
+    primary_key = get_table(model).primary_key.columns.values()[0]
+    if after is not None:
+        query = query.filter(primary_key > after)
+    return query.order_by(primary_key).limit(limit)
+
+
+def get_row_by_id(
+    model: type[SQLModel], data_id: int, fields: Sequence[str] | None = None
+) -> Row[Any] | None:
+    """Fetch an active row by id, only the given fields if set"""
+    primary_key = get_table(model).primary_key.columns.values()[0]
+    return (
+        read_query(model, fields)
+        .filter(primary_key == data_id)
+        .filter_by(active=True)
+        .first()
+    )
+
+
+def get_by_id(model: type[SQLModel], data_id: int) -> SQLModel | None:
+    """Fetch data by id, the item is tracked by the session to be written"""
     session = db.session()
     data = session.get(model, data_id)
     if data and hasattr(data, "active") and data.active is True:
@@ -28,57 +157,258 @@ def get_by_id(model: type[SQLModel], data_id: int) -> type[SQLModel] | None:
     return None
 
 
-def get_by_query_args(
-    model: type[SQLModel], data: dict[str, str]
-) -> list[type[SQLModel]]:
-    """Allow to search given certain args in data dict"""
+def get_by_ids(model: type[SQLModel], data_ids: Sequence[Any]) -> list[SQLModel]:
+    """Fetch the active data of all the ids in a single query"""
     session = db.session()
-    query = session.query(model)
-    for key, value in data.items():
-        if hasattr(model, key):
-            query = query.filter(getattr(model, key) == value)
-        else:
-            raise BadArgException(
-                f"Attribute '{key}' is not part of '{model.__tablename__}' info"
-            )
-    return query.all()
+    primary_key = get_table(model).primary_key.columns.values()[0]
+    return (
+        session.query(model)
+        .filter(primary_key.in_(data_ids))
+        .filter_by(active=True)
+        .order_by(primary_key)
+        .all()
+    )
+
 
+def _get_query_args_query(
+    model: type[SQLModel], data: dict[str, str], fields: Sequence[str] | None
+) -> Query[Any]:
+    """
+    Query filtered by the typed args in data dict, raise if any is not valid.
+    Only active rows are searched, unless the active flag is filtered.
+    """
+    query_filter = parse_filters(model, data)
+    query = read_query(model, fields)
+    if hasattr(model, "active") and all(
+        column != "active" for column, _ in query_filter.signature
+    ):
+        query = query.filter_by(active=True)
+    clauses = compile_filters(model, query_filter.signature)
+    return query.filter(*clauses).params(**query_filter.values)
+
+
+def get_by_query_args(
+    model: type[SQLModel],
+    data: dict[str, str],
+    limit: int | None = None,
+    after: int | None = None,
+    fields: Sequence[str] | None = None,
+) -> list[Row[Any]]:
+    """Allow to search given certain args in data dict, paged if limit is set"""
+    query = _get_query_args_query(model, data, fields)
+    return _get_page_query(model, query, limit, after).all()
 
-def save(model: type[SQLModel], data: dict[str, Any]) -> type[SQLModel]:
-    """Persist object in database"""
+
+def iter_all(
+    model: type[SQLModel], fields: Sequence[str] | None = None, chunk_size: int = 500
+) -> Iterable[Any]:
+    """
+    Iterate all active rows, they are fetched chunk_size at a time.
+    It should be consumed while the app context is alive.
+    """
+    return read_query(model, fields).filter_by(active=True).yield_per(chunk_size)
+
+
+def iter_by_query_args(
+    model: type[SQLModel],
+    data: dict[str, str],
+    fields: Sequence[str] | None = None,
+    chunk_size: int = 500,
+) -> Iterable[Any]:
+    """Same as iter_all but searching the args in data dict, validated now"""
+    return _get_query_args_query(model, data, fields).yield_per(chunk_size)
+
+
+def _after_write(table: str) -> None:
+    """Move the table version forward and read the table from the primary"""
+    bump_table_version(table)
+    app_replicas.stick_to_primary(table)
+
+
+def _get_insert_row(
+    model: type[SQLModel], item: dict[str, Any], now: datetime
+) -> dict[str, Any]:
+    """Values to insert, a missing primary key is left to the db"""
+    primary_key = get_table(model).primary_key.columns.keys()[0]
+    row = {key: value for key, value in item.items() if key != primary_key}
+    if item.get(primary_key) is not None:
+        row[primary_key] = item[primary_key]
+    if hasattr(model, "created_at") and row.get("created_at") is None:
+        row["created_at"] = now
+    return row
+
+
+def _supports_returning(session: Session, statement: str) -> bool:
+    """If the db dialect reads back rows on insert or update statements"""
+    return bool(getattr(session.get_bind().dialect, f"{statement}_returning"))
+
+
+def save(model: type[SQLModel], data: dict[str, Any]) -> SQLModel:
+    """
+    Persist object in database. The row is read back in the same
+    statement using INSERT ... RETURNING when the db supports it,
+    otherwise it is refreshed after commit.
+    """
     session = db.session()
+    table = get_table(model)
     obj = model(**data)
-    if hasattr(obj, "created_at") and obj.created_at is None:
-        obj.created_at = datetime.now(timezone.utc)
-    session.add(obj)
-    session.commit()
-    session.refresh(obj)
+    row = _get_insert_row(model, obj.model_dump(), datetime.now(timezone.utc))
+    with app_write_stats.track(table.name, "save"):
+        if _supports_returning(session, "insert"):
+            result = session.execute(
+                insert(table).values(row).returning(*table.columns)
+            ).one()
+            session.commit()
+            obj = model(**result._mapping)
+        else:
+            obj = model(**row)
+            session.add(obj)
+            session.commit()
+            session.refresh(obj)
+    _after_write(table.name)
     return obj
 
 
-def patch(model: type[SQLModel], data: dict[str, Any]) -> type[SQLModel]:
-    """Update object in database"""
+def _insert_all_returning(
+    session: Session, model: type[SQLModel], rows: list[dict[str, Any]]
+) -> list[SQLModel]:
+    """
+    Insert the rows and read them back in their order. A multi-row
+    insert needs the same keys in every row, so the rows with and
+    without a primary key are sent as one insert each.
+    """
+    table = get_table(model)
+    groups: dict[tuple[str, ...], list[int]] = defaultdict(list)
+    for index, row in enumerate(rows):
+        groups[tuple(row)].append(index)
+    objs: dict[int, SQLModel] = {}
+    for indexes in groups.values():
+        results = session.execute(
+            insert(table).returning(*table.columns, sort_by_parameter_order=True),
+            [rows[index] for index in indexes],
+        )
+        # plain objects, the session ones would be reloaded after commit
+        objs.update(zip(indexes, (model(**result._mapping) for result in results)))
+    return [objs[index] for index in range(len(rows))]
+
+
+def save_all(model: type[SQLModel], data: list[dict[str, Any]]) -> list[SQLModel]:
+    """
+    Persist all the objects in a single transaction, the rows are
+    sent as multi-row inserts and read back using RETURNING, in
+    the order of data. Without RETURNING they are added one by one
+    and refreshed after commit.
+    """
     session = db.session()
-    update_performed = False
-    for key, value in data.items():
+    table = get_table(model)
+    now = datetime.now(timezone.utc)
+    rows = [_get_insert_row(model, item, now) for item in data]
+    with app_write_stats.track(table.name, "save_all"):
+        if _supports_returning(session, "insert"):
+            objs = _insert_all_returning(session, model, rows)
+            session.commit()
+        else:
+            objs = [model(**row) for row in rows]
+            session.add_all(objs)
+            session.commit()
+            for obj in objs:
+                session.refresh(obj)
+    _after_write(table.name)
+    return objs
+
+
+def _check_updatable_fields(
+    model: type[SQLModel] | SQLModel, fields: Iterable[str]
+) -> None:
+    """Raise if any field can not be updated or is not a column of the model"""
+    columns = get_table(model).columns
+    for key in fields:
         if key in NON_UPDATABLE_FIELDS:
             raise UnpatchableFieldException(key)
-        if hasattr(model, key):
-            setattr(model, key, value)
-            update_performed = True
-        else:
+        if key not in columns:
             raise BadArgException(
                 f"Attribute '{key}' is not part of '{model.__tablename__}' info"
             )
-    if update_performed and hasattr(model, "updated_at"):
-        model.updated_at = datetime.now(timezone.utc)
-    session.commit()
-    session.refresh(model)
+
+
+def patch(model: SQLModel, data: dict[str, Any]) -> SQLModel:
+    """
+    Update object in database. The row is read back in the same
+    statement using UPDATE ... RETURNING when the db supports it,
+    otherwise it is refreshed after commit.
+    """
+    session = db.session()
+    table = get_table(model)
+    _check_updatable_fields(model, data)
+    changes = dict(data)
+    if len(changes) > 0 and hasattr(model, "updated_at"):
+        changes["updated_at"] = datetime.now(timezone.utc)
+    with app_write_stats.track(table.name, "patch"):
+        if len(changes) > 0 and _supports_returning(session, "update"):
+            primary_key = table.primary_key.columns.values()[0]
+            result = session.execute(
+                update(table)
+                .where(primary_key == getattr(model, primary_key.key))
+                .values(changes)
+                .returning(*table.columns)
+            ).one()
+            session.commit()
+            model = type(model)(**result._mapping)
+        else:
+            for key, value in changes.items():
+                setattr(model, key, value)
+            session.commit()
+            session.refresh(model)
+    _after_write(table.name)
     return model
 
 
-def delete(obj: type[SQLModel]) -> None:
+def patch_all(model: type[SQLModel], data: dict[Any, dict[str, Any]]) -> list[SQLModel]:
+    """
+    Update several objects by id in a single transaction.
+    The fields are checked once for the whole batch and the rows
+    are sent as set-based UPDATE statements by primary key.
+    """
+    session = db.session()
+    table = get_table(model)
+    primary_key = table.primary_key.columns.keys()[0]
+    fields = {key for changes in data.values() for key in changes}
+    if primary_key in fields:
+        raise UnpatchableFieldException(primary_key)
+    _check_updatable_fields(model, fields)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for data_id, changes in data.items():
+        if len(changes) > 0:
+            row = {**changes, primary_key: data_id}
+            if hasattr(model, "updated_at"):
+                row["updated_at"] = now
+            rows.append(row)
+    with app_write_stats.track(table.name, "patch_all"):
+        if rows:
+            session.execute(update(model), rows)
+        session.commit()
+        results = get_by_ids(model, list(data))
+    _after_write(table.name)
+    return results
+
+
+def delete(obj: SQLModel) -> None:
     """Remove object from database"""
     session = db.session()
-    session.delete(obj)
-    session.commit()
+    table = get_table(obj)
+    with app_write_stats.track(table.name, "delete"):
+        session.delete(obj)
+        session.commit()
+    _after_write(table.name)
+
+
+def delete_all(model: type[SQLModel], data_ids: Sequence[Any]) -> None:
+    """Remove several objects by id with a single DELETE statement"""
+    session = db.session()
+    table = get_table(model)
+    primary_key = table.primary_key.columns.values()[0]
+    with app_write_stats.track(table.name, "delete_all"):
+        session.execute(sql_delete(model).where(primary_key.in_(data_ids)))
+        session.commit()
+    _after_write(table.name)
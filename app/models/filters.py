@@ -0,0 +1,174 @@
+"""Typed filters for the query args, e.g. base_cost__lte=1000"""
+
+from collections.abc import Callable
+from datetime import datetime
+from functools import cache, lru_cache
+import hashlib
+import operator
+from typing import Any, Final, NamedTuple
+
+from sqlalchemy import ColumnElement, bindparam
+from sqlmodel import SQLModel
+
+from app.error.custom_exc import BadArgException
+from app.models.models import get_table
+
+
+OPERATOR_SEPARATOR: Final[str] = "__"
+LIKE_ESCAPE: Final[str] = "/"
+TRUE_VALUES: Final[frozenset[str]] = frozenset({"1", "true", "yes"})
+FALSE_VALUES: Final[frozenset[str]] = frozenset({"0", "false", "no"})
+EQUALITY_OPERATORS: Final[frozenset[str]] = frozenset({"eq", "ne"})
+RANGE_OPERATORS: Final[frozenset[str]] = EQUALITY_OPERATORS | {
+    "lt",
+    "lte",
+    "gt",
+    "gte",
+    "in",
+}
+OPERATORS: Final[dict[str, Callable[[Any, Any], ColumnElement[bool]]]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda column, param: column.in_(param),
+    "prefix": lambda column, param: column.startswith(param, escape=LIKE_ESCAPE),
+}
+
+
+class FilterColumn(NamedTuple):
+    """A column that can be filtered, how its values are read and compared"""
+
+    column: Any
+    coerce: Callable[[str], Any]
+    operators: frozenset[str]
+
+
+class QueryFilter(NamedTuple):
+    """Filters of a request: the normalized signature and the values to bind"""
+
+    signature: tuple[tuple[str, str], ...]
+    values: dict[str, Any]
+
+
+def to_bool(value: str) -> bool:
+    """Read a boolean flag like true, 1 or no"""
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError(value)
+
+
+def to_prefix(value: str) -> str:
+    """Escape the like wildcards, so the value is matched as is"""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        value = value.replace(char, f"{LIKE_ESCAPE}{char}")
+    return value
+
+
+@cache
+def get_filter_columns(model: type[SQLModel]) -> dict[str, FilterColumn]:
+    """Columns of the model with their coercer and operators, built once"""
+    filter_columns = {}
+    coerce: Callable[[str], Any]
+    for column in get_table(model).columns:
+        # type decorators like AutoString only know the type of their impl
+        python_type = getattr(column.type, "impl_instance", column.type).python_type
+        if python_type is bool:
+            coerce, operators = to_bool, EQUALITY_OPERATORS
+        elif python_type is datetime:
+            coerce, operators = datetime.fromisoformat, RANGE_OPERATORS
+        elif python_type is str:
+            coerce, operators = str, RANGE_OPERATORS | {"prefix"}
+        else:
+            coerce, operators = python_type, RANGE_OPERATORS
+        filter_columns[column.key] = FilterColumn(
+            getattr(model, column.key), coerce, frozenset(operators)
+        )
+    return filter_columns
+
+
+def get_param_name(column: str, operator_name: str) -> str:
+    """Name of the bound parameter of a filter"""
+    return f"{column}{OPERATOR_SEPARATOR}{operator_name}"
+
+
+def parse_filters(model: type[SQLModel], data: dict[str, str]) -> QueryFilter:
+    """
+    Validate the query args and read their values with the column type.
+        Args:
+            model (SQLModel): model to filter.
+            data (dict): args like name__prefix=Tes or faction_id__in=1,2.
+        Returns:
+            QueryFilter: signature to compile and values to bind
+    """
+    filter_columns = get_filter_columns(model)
+    signature = []
+    values = {}
+    for key, raw_value in data.items():
+        column, _, operator_name = key.partition(OPERATOR_SEPARATOR)
+        operator_name = operator_name or "eq"
+        if column not in filter_columns:
+            raise BadArgException(
+                f"Attribute '{column}' is not part of '{model.__tablename__}' info"
+            )
+        filter_column = filter_columns[column]
+        if operator_name not in filter_column.operators:
+            raise BadArgException(
+                f"Operator '{operator_name}' is not valid for {column}"
+            )
+        try:
+            if operator_name == "in":
+                value: Any = [
+                    filter_column.coerce(item) for item in raw_value.split(",")
+                ]
+            elif operator_name == "prefix":
+                value = to_prefix(raw_value)
+            else:
+                value = filter_column.coerce(raw_value)
+        except ValueError as exc:
+            raise BadArgException(
+                f"Value '{raw_value}' is not valid for {key}"
+            ) from exc
+        signature.append((column, operator_name))
+        values[get_param_name(column, operator_name)] = value
+    return QueryFilter(tuple(sorted(signature)), values)
+
+
+def get_filter_key(query_filter: QueryFilter) -> str:
+    """
+    Digest of the normalized filter, the same for any order of the args
+    or of the in values, e.g. faction_id__in=2,1 and faction_id__in=1,2
+    """
+    normalized = [
+        (
+            name,
+            sorted(set(map(repr, value))) if isinstance(value, list) else repr(value),
+        )
+        for name, value in sorted(query_filter.values.items())
+    ]
+    return hashlib.blake2b(repr(normalized).encode(), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=512)
+def compile_filters(
+    model: type[SQLModel], signature: tuple[tuple[str, str], ...]
+) -> tuple[ColumnElement[bool], ...]:
+    """
+    Filter clauses with bound parameters for a signature, so every request
+    with the same filters reuses them and only the values change
+    """
+    filter_columns = get_filter_columns(model)
+    return tuple(
+        OPERATORS[operator_name](
+            filter_columns[column].column,
+            bindparam(
+                get_param_name(column, operator_name),
+                expanding=operator_name == "in",
+            ),
+        )
+        for column, operator_name in signature
+    )
@@ -1,10 +1,23 @@
 """All db models definition"""
 
-from sqlalchemy import UniqueConstraint
+from typing import cast
+
+from sqlalchemy import Index, Table, UniqueConstraint
+from sqlmodel import SQLModel
 
 import app.models.schemas as schemas
 
 
+def get_table(model: type[SQLModel] | SQLModel) -> Table:
+    """Table of a model or of one of its objects"""
+    return cast(Table, getattr(model, "__table__"))
+
+
+def get_faction_index(table: str) -> Index:
+    """Index of the rows of a faction, the money options look them up"""
+    return Index(f"ix_{table}_faction_id_active", "faction_id", "active")
+
+
 # Init db entities
 class Boat(schemas.BoatBase, table=True):
     """Boat each faction can build"""
@@ -22,6 +35,7 @@ class BoatXFaction(schemas.BoatXFactionBase, table=True):
 
     __table_args__ = (
         UniqueConstraint("boat_id", "faction_id", name="uq_boat_faction"),
+        get_faction_index("boatxfaction"),
     )
 
 
@@ -55,6 +69,7 @@ class InfantryXFaction(schemas.InfantryXFactionBase, table=True):
 
     __table_args__ = (
         UniqueConstraint("infantry_id", "faction_id", name="uq_infantry_faction"),
+        get_faction_index("infantryxfaction"),
     )
 
 
@@ -74,6 +89,7 @@ class PlaneXFaction(schemas.PlaneXFactionBase, table=True):
 
     __table_args__ = (
         UniqueConstraint("plane_id", "faction_id", name="uq_plane_faction"),
+        get_faction_index("planexfaction"),
     )
 
 
@@ -93,6 +109,7 @@ class StructureXFaction(schemas.StructureXFactionBase, table=True):
 
     __table_args__ = (
         UniqueConstraint("structure_id", "faction_id", name="uq_structure_faction"),
+        get_faction_index("structurexfaction"),
     )
 
 
@@ -112,4 +129,5 @@ class TankXFaction(schemas.TankXFactionBase, table=True):
 
     __table_args__ = (
         UniqueConstraint("tank_id", "faction_id", name="uq_tank_faction"),
+        get_faction_index("tankxfaction"),
     )
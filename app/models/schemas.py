@@ -16,7 +16,9 @@ class CommonDataMixin(BaseModel):
         default_factory=lambda: datetime.now(timezone.utc), nullable=False
     )
     # need to handle now onupdate manually per sa_column + pydantic 2.x bug
-    updated_at: Optional[datetime] = Field(DateTime, nullable=True)
+    updated_at: Optional[datetime] = Field(
+        default=None, sa_type=DateTime, nullable=True
+    )
 
 
 class NamedMixin(BaseModel):
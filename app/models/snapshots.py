@@ -0,0 +1,74 @@
+"""Immutable snapshots of db rows, safe to cache and share across threads"""
+
+from collections import namedtuple
+from collections.abc import Sequence
+from functools import cache
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel
+from sqlalchemy import Row
+from sqlmodel import SQLModel
+
+from app.models import schemas
+
+
+SNAPSHOT_SUFFIX = "Snapshot"
+
+
+class MoneyOption(NamedTuple):
+    """A unit that a faction can build, used to spend the money"""
+
+    name: str
+    base_cost: int
+    build_limit: bool
+    custom_cost: int | None
+
+
+@cache
+def get_snapshot_type(schema: type[BaseModel]) -> type[tuple[Any, ...]]:
+    """
+    Named tuple with the fields of the schema, e.g. BoatBaseSnapshot.
+    It is created once per schema and it lives in this module,
+    so pickle is able to find it in any worker.
+    """
+    return namedtuple(
+        f"{schema.__name__}{SNAPSHOT_SUFFIX}", schema.model_fields, module=__name__
+    )
+
+
+def __getattr__(name: str) -> Any:
+    """Build the snapshot type of a schema when pickle looks it up"""
+    schema = getattr(schemas, name.removesuffix(SNAPSHOT_SUFFIX), None)
+    if name.endswith(SNAPSHOT_SUFFIX) and schema is not None:
+        return get_snapshot_type(schema)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def to_snapshot(item: SQLModel | Row[Any], schema: type[BaseModel]) -> tuple[Any, ...]:
+    """
+    Copy the schema fields of a db item, no session state is kept.
+    A row of every column is copied as is, its values come typed from db.
+    """
+    if isinstance(item, Row):
+        return get_snapshot_type(schema)(**item._mapping)
+    return get_snapshot_type(schema)(**schema(**item.model_dump()).model_dump())
+
+
+def snapshot_to_dict(snapshot: Any, exclude_none: bool = True) -> dict[str, Any]:
+    """Map a snapshot into json schema"""
+    return {
+        key: value
+        for key, value in snapshot._asdict().items()
+        if value is not None or not exclude_none
+    }
+
+
+def values_to_dict(
+    fields: Sequence[str], values: Sequence[Any], exclude_none: bool = True
+) -> dict[str, Any]:
+    """Map the values of a projected row into json schema"""
+    return {
+        key: value
+        for key, value in zip(fields, values)
+        if value is not None or not exclude_none
+    }
@@ -8,6 +8,41 @@ def get_cache_model_response() -> Model | OrderedModel:
     return fields.List(fields.String, description="List of keys", example=["boats"])
 
 
+def get_cache_stats_model_response(ns: Namespace) -> Model | OrderedModel:
+    """Build namespace model for cache stats response"""
+    namespace_model = ns.model(
+        "CacheNamespaceStats",
+        {
+            "hits": fields.Integer(example=120),
+            "negative_hits": fields.Integer(example=3),
+            "misses": fields.Integer(example=2),
+            "coalesced": fields.Integer(description="Misses that waited a loader"),
+            "evictions": fields.Integer(example=0),
+            "stale_hits": fields.Integer(description="Hits after the soft timeout"),
+            "refreshes": fields.Integer(example=1),
+            "refresh_failures": fields.Integer(example=0),
+            "rejections": fields.Integer(
+                description="Filtered lists not cached, over max_filters"
+            ),
+            "loads": fields.Integer(example=2),
+            "load_time_avg_ms": fields.Float(example=12.5),
+            "load_time_max_ms": fields.Float(example=18.2),
+            "entries": fields.Integer(example=1),
+            "bytes": fields.Integer(description="Approximate size", example=4096),
+        },
+    )
+    return ns.model(
+        "CacheStats",
+        {
+            "backend": fields.String(example="SimpleCache"),
+            "entries": fields.Integer(example=1),
+            "bytes": fields.Integer(description="Approximate size", example=4096),
+            "evictions": fields.Integer(description="Null if backend does not count"),
+            "namespaces": fields.Wildcard(fields.Nested(namespace_model)),
+        },
+    )
+
+
 def get_health_model_response(ns: Namespace) -> Model | OrderedModel:
     """Build namespace model for health response"""
     return ns.model(
@@ -16,6 +51,48 @@ def get_health_model_response(ns: Namespace) -> Model | OrderedModel:
     )
 
 
+def get_write_stats_model_response(ns: Namespace) -> Model | OrderedModel:
+    """Build namespace model for db write stats response"""
+    write_model = ns.model(
+        "WriteStats",
+        {
+            "writes": fields.Integer(example=12),
+            "round_trips": fields.Integer(description="Statements sent to the db"),
+            "round_trips_avg": fields.Float(example=2.0),
+        },
+    )
+    return fields.Wildcard(
+        fields.Wildcard(fields.Nested(write_model)),
+        description="Stats by table and write, e.g. boat and save",
+    )
+
+
+def get_pool_stats_model_response(ns: Namespace) -> Model | OrderedModel:
+    """Build namespace model for db pool stats response"""
+    pool_model = ns.model(
+        "PoolStats",
+        {
+            "size": fields.Integer(description="Connections kept open", example=5),
+            "checked_in": fields.Integer(description="Idle connections"),
+            "checked_out": fields.Integer(description="Connections in use"),
+            "overflow": fields.Integer(
+                description="Connections over size, negative while some are not open"
+            ),
+            "checkouts": fields.Integer(example=120),
+            "timeouts": fields.Integer(description="Checkouts that gave up waiting"),
+            "wait_ms_avg": fields.Float(description="Wait for a free connection"),
+            "wait_ms_max": fields.Float(),
+            "connects": fields.Integer(description="Db connections opened"),
+            "connect_ms_avg": fields.Float(),
+            "connect_ms_max": fields.Float(),
+        },
+    )
+    return fields.Wildcard(
+        fields.Nested(pool_model),
+        description="Stats by engine, e.g. primary or replica-0",
+    )
+
+
 def get_money_model_response(ns: Namespace) -> Model | OrderedModel:
     """Build namespace model for money response"""
     units_model = ns.model(
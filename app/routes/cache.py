@@ -5,7 +5,10 @@ from http import HTTPStatus
 from flask import jsonify, make_response, typing
 from flask_restx import Namespace, Resource
 
-from app.models.swagger import get_cache_model_response
+from app.models.swagger import (
+    get_cache_model_response,
+    get_cache_stats_model_response,
+)
 from app.service.cache_service import CacheService
 
 
@@ -13,6 +16,7 @@ cache_ns = Namespace(
     "cache", description="App cache controller endpoints", path="/api/cache"
 )
 cache_model = get_cache_model_response()
+cache_stats_model = get_cache_stats_model_response(cache_ns)
 cache_service = CacheService()
 
 
@@ -27,6 +31,17 @@ class CacheKeyResource(Resource):
         return jsonify(cache_service.get_cache_keys())
 
 
+@cache_ns.route("/stats")
+@cache_ns.doc("Allows to check if caching is helping")
+class CacheStatsResource(Resource):
+    """Cache stats endpoints"""
+
+    @cache_ns.response(HTTPStatus.OK.value, "Cache stats", cache_stats_model)
+    def get(self) -> typing.ResponseReturnValue:
+        """Retrieve hit, miss, size and loader latency stats by namespace"""
+        return jsonify(cache_service.get_cache_stats())
+
+
 @cache_ns.route("/clear")
 @cache_ns.doc("Allows to retrieve all the keys in cache")
 class CacheClearResource(Resource):
@@ -6,11 +6,20 @@ from flask import jsonify, typing
 from flask_restx import Namespace, Resource
 
 from app.core.limiter import app_limiter
-from app.models.swagger import get_health_model_response
+from app.core.pool_stats import app_pool_stats
+from app.core.write_stats import app_write_stats
+from app.models.database import get_engines
+from app.models.swagger import (
+    get_health_model_response,
+    get_pool_stats_model_response,
+    get_write_stats_model_response,
+)
 
 
 health_ns = Namespace("health", description="App status/readiness check")
 health_model = get_health_model_response(health_ns)
+write_stats_model = get_write_stats_model_response(health_ns)
+pool_stats_model = get_pool_stats_model_response(health_ns)
 
 
 @health_ns.route("")
@@ -22,3 +31,25 @@ class HealthResource(Resource):
     def get(self) -> typing.ResponseReturnValue:
         """Return UP if app is running"""
         return jsonify(status="UP")
+
+
+@health_ns.route("/writes")
+class WriteStatsResource(Resource):
+    """Namespace to expose the db round trips of each write"""
+
+    @app_limiter.exempt
+    @health_ns.response(HTTPStatus.OK.value, "Db write stats", write_stats_model)
+    def get(self) -> typing.ResponseReturnValue:
+        """Return the writes and their round trips by table"""
+        return jsonify(app_write_stats.get_stats())
+
+
+@health_ns.route("/pools")
+class PoolStatsResource(Resource):
+    """Namespace to expose the db connection pools"""
+
+    @app_limiter.exempt
+    @health_ns.response(HTTPStatus.OK.value, "Db pool stats", pool_stats_model)
+    def get(self) -> typing.ResponseReturnValue:
+        """Return the live state and wait times of each pool"""
+        return jsonify(app_pool_stats.get_stats(get_engines()))
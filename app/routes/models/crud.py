@@ -1,94 +1,775 @@
 """Allow to generate a resource that can be reused to expose several crud models"""
 
 from builtins import map
+from collections.abc import Callable, Iterator, Sequence
+from functools import partial, wraps
 from http import HTTPStatus
-from typing import Any
+from typing import Any, Final
+from urllib.parse import urlencode
+import zlib
 
-from flask import make_response, jsonify, render_template, request, typing
+from flask import (
+    Response,
+    current_app,
+    make_response,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+    typing,
+)
 from flask_restx import Namespace, Resource
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Row
 from sqlmodel import SQLModel
 
-from app.error.custom_exc import NotFoundException
+from app.core.table_versions import get_table_version, has_shared_versions
+from app.error.custom_exc import BadArgException, NotFoundException
 from app.models.database import (
     get_all,
     get_by_id,
+    get_by_ids,
     get_by_query_args,
+    get_page,
+    get_row_by_id,
+    iter_all,
+    iter_by_query_args,
     delete,
+    delete_all,
     patch,
+    patch_all,
     save,
+    save_all,
+)
+from app.models.filters import QueryFilter, get_filter_key, parse_filters
+from app.models.models import get_table
+from app.models.snapshots import snapshot_to_dict, to_snapshot, values_to_dict
+from app.service.cache_service import (
+    PICKLE_SERIALIZER,
+    CacheService,
+    get_cache_policy,
+    get_column_tag,
+    get_model_namespace,
+    get_row_tag,
 )
-from app.service.cache_service import CacheService
+from app.service.money_spend_service import tag_columns_dict
 
 
-def create_crud_resource(
-    ns: Namespace,
+JSON_MIMETYPE: Final[str] = "application/json"
+NDJSON_MIMETYPE: Final[str] = "application/x-ndjson"
+STREAM_CHUNK_SIZE: Final[int] = 500
+MAX_BULK_ITEMS: Final[int] = 1000
+DEFAULT_PAGE_LIMIT: Final[int] = 100
+MAX_PAGE_LIMIT: Final[int] = 500
+# loaders that fill the list cache of each route, used by cache warmup
+cache_warmers: dict[str, Callable[[], Any]] = {}
+# shared by the crud resources, the backend is the app cache
+cache_service = CacheService()
+
+
+def get_page_args(query_params: dict[str, str]) -> tuple[int, int | None] | None:
+    """
+    Remove limit and after from the query args.
+        Args:
+            query_params (dict): request args, the page ones are removed.
+        Returns:
+            tuple: limit and last primary key seen, None if it is not paged
+    """
+    limit = query_params.pop("limit", None)
+    after = query_params.pop("after", None)
+    if limit is None and after is None:
+        return None
+    try:
+        page_limit = DEFAULT_PAGE_LIMIT if limit is None else int(limit)
+        page_after = None if after is None else int(after)
+    except ValueError as exc:
+        raise BadArgException("Args 'limit' and 'after' should be integers") from exc
+    if not 0 < page_limit <= MAX_PAGE_LIMIT:
+        raise BadArgException(f"Arg 'limit' should be between 1 and {MAX_PAGE_LIMIT}")
+    return page_limit, page_after
+
+
+def get_stream_mimetype(query_params: dict[str, str]) -> str | None:
+    """
+    Remove stream from the query args.
+        Args:
+            query_params (dict): request args, stream is removed.
+        Returns:
+            str: ndjson if it is accepted, json if stream is set, else None
+    """
+    stream = query_params.pop("stream", None)
+    accepted = request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE])
+    if accepted == NDJSON_MIMETYPE:
+        return NDJSON_MIMETYPE
+    if stream is not None and stream.lower() in {"1", "true"}:
+        return JSON_MIMETYPE
+    return None
+
+
+def get_fields_arg(
+    query_params: dict[str, str], model: type[SQLModel]
+) -> tuple[str, ...] | None:
+    """
+    Remove fields from the query args, the primary key is always selected.
+        Args:
+            query_params (dict): request args, fields is removed.
+            model (SQLModel): model the fields should belong to.
+        Returns:
+            tuple: columns to select in table order, None to select all
+    """
+    fields = query_params.pop("fields", None)
+    if fields is None:
+        return None
+    names = {field.strip() for field in fields.split(",") if field.strip()}
+    columns = get_table(model).columns.keys()
+    unknown = sorted(names - set(columns))
+    if unknown or not names:
+        raise BadArgException(
+            f"Fields '{', '.join(unknown)}' are not part of '{model.__tablename__}' info"
+        )
+    names.add(get_table(model).primary_key.columns.keys()[0])
+    return tuple(column for column in columns if column in names)
+
+
+def get_primary_key(model: type[SQLModel]) -> str:
+    """Name of the primary key column of a model"""
+    return str(get_table(model).primary_key.columns.keys()[0])
+
+
+def get_fields_suffix(fields: tuple[str, ...] | None) -> str | None:
+    """Part of the cache key that tells the projection apart"""
+    return None if fields is None else f"fields:{','.join(fields)}"
+
+
+def get_cache_key(
+    model: type[SQLModel],
+    item_id: int | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> str:
+    """get cache key for the model"""
+    path_name = get_model_namespace(model)
+    namespace = path_name if item_id is None else get_row_tag(path_name, item_id)
+    return cache_service.get_cache_key(namespace, get_fields_suffix(fields))
+
+
+def get_page_suffix(limit: int, after: int | None) -> str:
+    """Part of the cache key that tells the page apart"""
+    return f"page:{limit}" if after is None else f"page:{limit}:{after}"
+
+
+def get_page_cache_key(
+    model: type[SQLModel],
+    limit: int,
+    after: int | None,
+    fields: tuple[str, ...] | None = None,
+) -> str:
+    """get cache key for a page of the model"""
+    suffix = get_page_suffix(limit, after)
+    if fields is not None:
+        suffix += f":{get_fields_suffix(fields)}"
+    return cache_service.get_cache_key(get_model_namespace(model), suffix)
+
+
+def get_filter_cache_key(
+    base_key: str,
+    query_filter: QueryFilter,
+    page: tuple[int, int | None] | None,
+    fields: tuple[str, ...] | None,
+) -> str:
+    """get cache key for a filtered list, or page, of the model"""
+    cache_key = f"{base_key}:filter:{get_filter_key(query_filter)}"
+    if page is not None:
+        cache_key += f":{get_page_suffix(*page)}"
+    if fields is not None:
+        cache_key += f":{get_fields_suffix(fields)}"
+    return cache_key
+
+
+def get_entry_key(
+    model: type[SQLModel], get_key: Callable[[], str], version: int | None = None
+) -> str:
+    """
+    Key of a cached entry. With shared versions it holds the table
+    version, so a stale entry of a local cache level is never sent
+    with the etag of a newer version. The version read for the etag
+    is given as version, otherwise it is read here.
+    """
+    cache_key = get_key()
+    if has_shared_versions():
+        if version is None:
+            version = get_table_version(get_table(model).name)
+        cache_key += f":v{version}"
+    return cache_key
+
+
+def get_next_cursor(
+    model: type[SQLModel],
+    items: Sequence[Any],
+    limit: int,
+    fields: tuple[str, ...] | None = None,
+) -> Any:
+    """Primary key to request the next page, None on the last one"""
+    if len(items) < limit:
+        return None
+    primary_key = get_primary_key(model)
+    if fields is None:
+        return getattr(items[-1], primary_key)
+    return items[-1][fields.index(primary_key)]
+
+
+def with_etag(
+    model: type[SQLModel],
+) -> Callable[
+    [Callable[..., typing.ResponseReturnValue]],
+    Callable[..., typing.ResponseReturnValue],
+]:
+    """
+    Strong etag made of the table version and the request url.
+    A matching If-None-Match gets a 304 before db or serialization.
+    Etags are only sent when the versions live in a cache shared by
+    the workers, otherwise a worker could answer 304 after a write
+    on another one. The version is passed to fun, so the cache key
+    does not read it again.
+    """
+    table_name = get_table(model).name
+
+    def decorator(
+        fun: Callable[..., typing.ResponseReturnValue],
+    ) -> Callable[..., typing.ResponseReturnValue]:
+        @wraps(fun)
+        def wrapper(*args: Any, **kwargs: Any) -> typing.ResponseReturnValue:
+            if not has_shared_versions():
+                return fun(*args, **kwargs)
+            version = get_table_version(table_name)
+            # accept is part of it, the same url may be json or ndjson
+            variant = f"{request.full_path}|{request.headers.get('Accept', '')}"
+            etag = f"{version:x}-{zlib.crc32(variant.encode()):x}"
+            if request.if_none_match.contains(etag):
+                response = make_response("", HTTPStatus.NOT_MODIFIED.value)
+            else:
+                response = make_response(fun(*args, version=version, **kwargs))
+            response.set_etag(etag)
+            response.vary.add("Accept")
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def get_item_tags(model: type[SQLModel], item: Any) -> list[str]:
+    """Tags of the entries that depend on a written item"""
+    path_name = get_model_namespace(model)
+    tags = [get_row_tag(path_name, getattr(item, get_primary_key(model)))]
+    for column in tag_columns_dict.get(model, []):
+        tags.append(get_column_tag(path_name, column, getattr(item, column)))
+    return tags
+
+
+def map_item_to_dict(
+    schema: type[BaseModel],
+    item: Any,
+    exclude_none: bool = True,
+    fields: tuple[str, ...] | None = None,
+) -> dict[str, Any]:
+    """
+    Map a single item, row or snapshot into json schema,
+    projected rows only hold the values of the fields
+    """
+    if fields is not None:
+        return values_to_dict(fields, item, exclude_none)
+    if isinstance(item, Row):
+        return values_to_dict(item._fields, item, exclude_none)
+    if isinstance(item, tuple):
+        return snapshot_to_dict(item, exclude_none)
+    return schema(**item.model_dump()).model_dump(exclude_none=exclude_none)
+
+
+def to_item_snapshot(
+    schema: type[BaseModel], item: Any, fields: tuple[str, ...] | None
+) -> tuple[Any, ...]:
+    """Immutable copy of an item, only the projected values if fields is set"""
+    return to_snapshot(item, schema) if fields is None else tuple(item)
+
+
+def snapshot_all_data(
     model: type[SQLModel],
     schema: type[BaseModel],
-) -> list:
-    """Boilerplate code to create a crud resource"""
-    name = model.__name__
-    path_name = "infantry" if name == "Infantry" else f"{name.lower()}s"
-    cache_service = CacheService()
+    fields: tuple[str, ...] | None = None,
+) -> tuple[tuple[Any, ...], ...] | None:
+    """Fetch all data from db as immutable snapshots"""
+    items = get_all(model, fields)
+    if len(items) > 0:
+        return tuple(to_item_snapshot(schema, item, fields) for item in items)
+    return None
+
+
+def snapshot_one_data(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    item_id: int,
+    fields: tuple[str, ...] | None = None,
+) -> tuple[Any, ...] | None:
+    """Fetch a single item from db as an immutable snapshot"""
+    item = get_row_by_id(model, item_id, fields)
+    if item:
+        return to_item_snapshot(schema, item, fields)
+    return None
+
+
+def snapshot_page_data(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    limit: int,
+    after: int | None,
+    fields: tuple[str, ...] | None = None,
+) -> tuple[tuple[Any, ...], ...]:
+    """Fetch a page from db as immutable snapshots"""
+    return tuple(
+        to_item_snapshot(schema, item, fields)
+        for item in get_page(model, limit, after, fields)
+    )
+
+
+def snapshot_filter_data(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    query_params: dict[str, str],
+    page: tuple[int, int | None] | None,
+    fields: tuple[str, ...] | None,
+) -> tuple[tuple[Any, ...], ...] | None:
+    """Fetch the filtered data from db as immutable snapshots"""
+    limit, after = page or (None, None)
+    snapshots = tuple(
+        to_item_snapshot(schema, item, fields)
+        for item in get_by_query_args(model, query_params, limit, after, fields)
+    )
+    return snapshots if snapshots or page is not None else None
+
+
+def render_page_data(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    limit: int,
+    fields: tuple[str, ...] | None,
+    snapshots: tuple[tuple[Any, ...], ...],
+) -> Response:
+    """Encode a page and its next cursor as json response"""
+    return jsonify(
+        {
+            "items": [
+                map_item_to_dict(schema, item, fields=fields) for item in snapshots
+            ],
+            "next": get_next_cursor(model, snapshots, limit, fields),
+        }
+    )
+
+
+def render_all_data(
+    schema: type[BaseModel],
+    fields: tuple[str, ...] | None,
+    snapshots: tuple[tuple[Any, ...], ...] | None,
+) -> Response | None:
+    """Encode all the snapshots as json response"""
+    if snapshots is None:
+        return None
+    return jsonify(
+        [map_item_to_dict(schema, item, fields=fields) for item in snapshots]
+    )
 
-    def get_cache_key(item_id: int | None = None) -> str:
-        """get cache key for the model"""
-        return path_name if item_id is None else f"{path_name}-{item_id}"
 
-    def fetch_all_data() -> list[type[SQLModel]]:
-        """
-        Fetch all data from db and transform in dict
-        """
-        return get_all(model)
+def render_one_data(
+    schema: type[BaseModel],
+    fields: tuple[str, ...] | None,
+    snapshot: tuple[Any, ...] | None,
+) -> Response | None:
+    """Encode a single snapshot as json response"""
+    if snapshot is None:
+        return None
+    return jsonify(map_item_to_dict(schema, snapshot, fields=fields))
+
+
+def fetch_snapshots(
+    model: type[SQLModel],
+    load: Callable[[], Any],
+    get_key: Callable[[], str],
+    base_key: str | None = None,
+    version: int | None = None,
+) -> Any:
+    """
+    Snapshots of load, cached if the namespace policy is enabled.
+    With base_key the entry is one of many, e.g. a filtered list,
+    and it is only cached while there is room for it under base_key.
+    """
+    policy = get_cache_policy(get_model_namespace(model))
+    if not policy.enabled:
+        return load()
+    # own key, a shared backend may still hold the json entry
+    cache_key = f"{get_entry_key(model, get_key, version)}:{PICKLE_SERIALIZER}"
+    if base_key is not None and not cache_service.admit_key(
+        cache_key, base_key, policy.max_filters
+    ):
+        return load()
+    return cache_service.fetch_from_cache_or_else(cache_key, load, policy=policy)
+
+
+def fetch_response(
+    model: type[SQLModel],
+    load: Callable[[], Any],
+    render: Callable[[Any], Response | None],
+    get_key: Callable[[], str],
+    base_key: str | None = None,
+    version: int | None = None,
+) -> Response | None:
+    """
+    Json response built by render from the snapshots of load,
+    cached as the namespace policy says: encoded body or row snapshots
+    """
+    policy = get_cache_policy(get_model_namespace(model))
+    if not policy.enabled or policy.serializer == PICKLE_SERIALIZER:
+        return render(fetch_snapshots(model, load, get_key, base_key, version))
+    cache_key = get_entry_key(model, get_key, version)
+    if base_key is not None and not cache_service.admit_key(
+        cache_key, base_key, policy.max_filters
+    ):
+        return render(load())
+    return cache_service.fetch_response_from_cache_or_else(
+        cache_key, lambda: render(load()), policy=policy
+    )
+
+
+def fetch_filter_snapshots(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    query_params: dict[str, str],
+    page: tuple[int, int | None] | None,
+    fields: tuple[str, ...] | None,
+    version: int | None = None,
+) -> Any:
+    """
+    Snapshots of the filtered items, cached by the normalized
+    filter and invalidated with the rest of the namespace
+    """
+    query_filter = parse_filters(model, query_params)
+    base_key = cache_service.get_cache_key(get_model_namespace(model))
+    return fetch_snapshots(
+        model,
+        partial(snapshot_filter_data, model, schema, query_params, page, fields),
+        partial(get_filter_cache_key, base_key, query_filter, page, fields),
+        base_key,
+        version,
+    )
+
+
+def fetch_filter_response(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    query_params: dict[str, str],
+    page: tuple[int, int | None] | None,
+    fields: tuple[str, ...] | None,
+    version: int | None = None,
+) -> Response | None:
+    """
+    Json response of the filtered items, cached by the normalized
+    filter and invalidated with the rest of the namespace
+    """
+    query_filter = parse_filters(model, query_params)
+    base_key = cache_service.get_cache_key(get_model_namespace(model))
+    return fetch_response(
+        model,
+        partial(snapshot_filter_data, model, schema, query_params, page, fields),
+        (
+            partial(render_all_data, schema, fields)
+            if page is None
+            else partial(render_page_data, model, schema, page[0], fields)
+        ),
+        partial(get_filter_cache_key, base_key, query_filter, page, fields),
+        base_key,
+        version,
+    )
+
+
+def fetch_all_response(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    fields: tuple[str, ...] | None = None,
+    version: int | None = None,
+) -> Response | None:
+    """Json response of all the items"""
+    return fetch_response(
+        model,
+        partial(snapshot_all_data, model, schema, fields),
+        partial(render_all_data, schema, fields),
+        partial(get_cache_key, model, None, fields),
+        version=version,
+    )
+
+
+def warm_cache(model: type[SQLModel], schema: type[BaseModel]) -> None:
+    """Fill the list cache of the model"""
+    if get_cache_policy(get_model_namespace(model)).enabled:
+        fetch_all_response(model, schema)
+
+
+def stream_items(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    query_params: dict[str, str],
+    fields: tuple[str, ...] | None,
+    mimetype: str,
+) -> Response:
+    """
+    Encode the rows while they are read from db, chunk by chunk,
+    as json lines or as a json array. It is not cached.
+    """
+    if len(query_params) > 0:
+        items = iter_by_query_args(model, query_params, fields, STREAM_CHUNK_SIZE)
+    else:
+        items = iter_all(model, fields, STREAM_CHUNK_SIZE)
+    is_ndjson = mimetype == NDJSON_MIMETYPE
+
+    def generate() -> Iterator[str]:
+        if not is_ndjson:
+            yield "["
+        chunk: list[str] = []
+        for index, item in enumerate(items):
+            data = current_app.json.dumps(map_item_to_dict(schema, item, fields=fields))
+            if is_ndjson:
+                chunk.append(f"{data}\n")
+            else:
+                chunk.append(f",{data}" if index > 0 else data)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk = []
+        yield "".join(chunk) if is_ndjson else "".join(chunk) + "]"
+
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def get_items_response(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    query_params: dict[str, str],
+    version: int | None = None,
+) -> Response | None:
+    """
+    Json response of the items of a crud list request: a stream,
+    a filtered list, a page or all the items, as the args say
+    """
+    page = get_page_args(query_params)
+    fields = get_fields_arg(query_params, model)
+    stream_mimetype = get_stream_mimetype(query_params)
+    if stream_mimetype is not None and page is None:
+        return stream_items(model, schema, query_params, fields, stream_mimetype)
+    if len(query_params) > 0:
+        return fetch_filter_response(model, schema, query_params, page, fields, version)
+    if page is not None:
+        return fetch_response(
+            model,
+            partial(snapshot_page_data, model, schema, *page, fields),
+            partial(render_page_data, model, schema, page[0], fields),
+            partial(get_page_cache_key, model, *page, fields),
+            version=version,
+        )
+    return fetch_all_response(model, schema, fields, version)
+
 
-    def fetch_one_data(item_id: int) -> Any:
-        return get_by_id(model, item_id)
+def render_view(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    query_params: dict[str, str],
+    version: int | None = None,
+) -> Response:
+    """Html table of the items of a crud view request, with its next page url"""
+    page = get_page_args(query_params)
+    fields = get_fields_arg(query_params, model)
+    if len(query_params) > 0:
+        items = fetch_filter_snapshots(
+            model, schema, query_params, page, fields, version
+        )
+    elif page is not None:
+        items = fetch_snapshots(
+            model,
+            partial(snapshot_page_data, model, schema, *page, fields),
+            partial(get_page_cache_key, model, *page, fields),
+            version=version,
+        )
+    else:
+        items = fetch_snapshots(
+            model,
+            partial(snapshot_all_data, model, schema, fields),
+            partial(get_cache_key, model, None, fields),
+            version=version,
+        )
+    items = items or ()
+    next_url = None
+    if page is not None:
+        next_cursor = get_next_cursor(model, items, page[0], fields)
+        if next_cursor is not None:
+            next_args = {**request.args, "after": next_cursor}
+            next_url = f"{request.path}?{urlencode(next_args)}"
+    items_schema = [map_item_to_dict(schema, item, False, fields) for item in items]
+    items_schema_html = render_template(
+        "table.html", data=items_schema, next_url=next_url
+    )
+    response = make_response(items_schema_html)
+    response.headers["Content-Type"] = "text/html"
+    return response
+
+
+def invalidate_items(model: type[SQLModel], items: Sequence[Any]) -> None:
+    """Invalidate the namespace of a model and the tags of the written items"""
+    tags = [tag for item in items for tag in get_item_tags(model, item)]
+    cache_service.invalidate_tags(get_model_namespace(model), *tags)
+
+
+def create_all(
+    model: type[SQLModel], schema: type[BaseModel], payload: list[Any]
+) -> typing.ResponseReturnValue:
+    """
+    Validate every item at once, a validation error lists the index
+    of each bad item and nothing is saved. Valid items are inserted
+    in a single transaction and the cache is invalidated once.
+    """
+    if not 0 < len(payload) <= MAX_BULK_ITEMS:
+        raise BadArgException(f"From 1 to {MAX_BULK_ITEMS} items can be created")
+    list_adapter: TypeAdapter[list[BaseModel]] = TypeAdapter(
+        list[schema]  # type: ignore[valid-type]
+    )
+    items = list_adapter.validate_python(payload)
+    results = save_all(model, [item.model_dump() for item in items])
+    invalidate_items(model, results)
+    data = [map_item_to_dict(schema, result) for result in results]
+    return make_response(jsonify(data), HTTPStatus.CREATED.value)
+
+
+def get_bulk_ids(ids: Any) -> list[int]:
+    """
+    Ids of a bulk request, they should be different integers.
+    A bool is an int for python, true would be the id 1.
+    """
+    if not isinstance(ids, list) or not 0 < len(ids) <= MAX_BULK_ITEMS:
+        raise BadArgException(f"A json array of up to {MAX_BULK_ITEMS} is needed")
+    if not all(
+        isinstance(item_id, int) and not isinstance(item_id, bool) for item_id in ids
+    ):
+        raise BadArgException("Each id should be an integer")
+    if len(set(ids)) < len(ids):
+        raise BadArgException("Each item should have a different id")
+    return ids
+
+
+def get_items_or_raise(model: type[SQLModel], ids: list[int]) -> list[Any]:
+    """Fetch all the items in one query, raise if any is not found"""
+    items = get_by_ids(model, ids)
+    if len(items) < len(ids):
+        primary_key = get_primary_key(model)
+        found = {getattr(item, primary_key) for item in items}
+        missing = [item_id for item_id in ids if item_id not in found]
+        raise NotFoundException(f"{model.__name__} {missing}")
+    return items
+
+
+def patch_all_items(
+    model: type[SQLModel], schema: type[BaseModel], payload: Any
+) -> typing.ResponseReturnValue:
+    """Apply the changes of each id in one transaction"""
+    if not isinstance(payload, list) or not all(
+        isinstance(item, dict) and isinstance(item.get("changes"), dict)
+        for item in payload
+    ):
+        raise BadArgException("Each item should have an id and its changes")
+    ids = get_bulk_ids([item.get("id") for item in payload])
+    changes = [item["changes"] for item in payload]
+    # row tags before the update, e.g. faction_id may change
+    items = get_items_or_raise(model, ids)
+    results = patch_all(model, dict(zip(ids, changes)))
+    invalidate_items(model, [*items, *results])
+    return jsonify([map_item_to_dict(schema, result) for result in results])
+
+
+def delete_all_items(model: type[SQLModel], payload: Any) -> typing.ResponseReturnValue:
+    """Remove all the ids in one statement"""
+    ids = get_bulk_ids(payload)
+    items = get_items_or_raise(model, ids)
+    delete_all(model, ids)
+    invalidate_items(model, items)
+    return make_response("", HTTPStatus.NO_CONTENT.value)
 
-    def map_item_to_dict(
-        item: type[SQLModel], exclude_none: bool = True
-    ) -> dict[str, Any]:
-        """Map a single item into json schema"""
-        return schema(**item.model_dump()).model_dump(exclude_none=exclude_none)
+
+def create_crud_resource(
+    ns: Namespace,
+    model: type[SQLModel],
+    schema: type[BaseModel],
+) -> list[Any]:
+    """Boilerplate code to create a crud resource"""
+    name = model.__name__
+    path_name = get_model_namespace(model)
+    cache_warmers[path_name] = partial(warm_cache, model, schema)
 
     @ns.route("")
     class CrudBaseResource(Resource):
         """Base path crud resource"""
 
-        def get(self) -> typing.ResponseReturnValue:
-            """Get all items in db"""
-            if len(request.args) > 0:
-                query_params = request.args.to_dict()
-                items = get_by_query_args(model, query_params)
-            else:
-                items = cache_service.fetch_from_cache_or_else(
-                    get_cache_key(), fetch_all_data
-                )
-            if len(items) > 0:
-                result = list(map(map_item_to_dict, items))
-                return jsonify(result)
+        @ns.doc(
+            params={
+                "limit": f"page size, up to {MAX_PAGE_LIMIT}",
+                "after": "next cursor of the previous page",
+                "fields": "comma separated columns to return",
+                "stream": "1 to stream a json array, or accept ndjson",
+            }
+        )
+        @with_etag(model)
+        def get(self, version: int | None = None) -> typing.ResponseReturnValue:
+            """Get all items in db, a page of them if limit or after are set"""
+            response = get_items_response(
+                model, schema, request.args.to_dict(), version
+            )
+            if response is not None:
+                return response
             raise NotFoundException(name)
 
         def post(self) -> typing.ResponseReturnValue:
-            """Allow to create an item"""
+            """Allow to create an item, or all the items of a json array"""
             payload = request.get_json()
+            if isinstance(payload, list):
+                return create_all(model, schema, payload)
             model_schema = schema(**payload)
             result = save(model, model_schema.model_dump())
-            cache_service.clear_cache_by_name(get_cache_key())
-            data = map_item_to_dict(result)
+            invalidate_items(model, [result])
+            data = map_item_to_dict(schema, result)
             return make_response(data, HTTPStatus.CREATED.value)
 
-    @ns.route("/<item_id>")
+        def patch(self) -> typing.ResponseReturnValue:
+            """Patch several items, a json array of id and changes"""
+            return patch_all_items(model, schema, request.get_json())
+
+        def delete(self) -> typing.ResponseReturnValue:
+            """Delete several items, a json array of ids"""
+            return delete_all_items(model, request.get_json())
+
+    @ns.route("/<int:item_id>")
     @ns.param("item_id", f"{path_name}'s id to fetch data")
     class CrudIdResource(Resource):
         """All the actions on id based resource path"""
 
-        def get(self, item_id: int) -> typing.ResponseReturnValue:
+        @ns.doc(params={"fields": "comma separated columns to return"})
+        @with_etag(model)
+        def get(
+            self, item_id: int, version: int | None = None
+        ) -> typing.ResponseReturnValue:
             """Get a single item by id"""
-            item = cache_service.fetch_from_cache_or_else(
-                get_cache_key(item_id), fetch_one_data, item_id=item_id
+            query_params = request.args.to_dict()
+            fields = get_fields_arg(query_params, model)
+            response = fetch_response(
+                model,
+                partial(snapshot_one_data, model, schema, item_id, fields),
+                partial(render_one_data, schema, fields),
+                partial(get_cache_key, model, item_id, fields),
+                version=version,
             )
-            if item:
-                return jsonify(map_item_to_dict(item))
+            if response is not None:
+                return response
             raise NotFoundException(name)
 
         def patch(self, item_id: int) -> typing.ResponseReturnValue:
@@ -96,17 +777,22 @@ def create_crud_resource(
             payload = request.get_json()
             item = get_by_id(model, item_id)
             if item:
+                # row tags before the update, e.g. faction_id may change
+                previous_tags = get_item_tags(model, item)
                 result = patch(item, payload)
-                cache_service.clear_cache_by_name(get_cache_key())
-                return jsonify(map_item_to_dict(result))
+                cache_service.invalidate_tags(
+                    path_name, *previous_tags, *get_item_tags(model, result)
+                )
+                return jsonify(map_item_to_dict(schema, result))
             raise NotFoundException(name)
 
         def delete(self, item_id: int) -> typing.ResponseReturnValue:
             """Allow to delete an item"""
             item = get_by_id(model, item_id)
             if item:
+                item_tags = get_item_tags(model, item)
                 delete(item)
-                cache_service.clear_cache_by_name(get_cache_key())
+                cache_service.invalidate_tags(path_name, *item_tags)
                 return make_response("", HTTPStatus.NO_CONTENT.value)
             raise NotFoundException(name)
 
@@ -114,18 +800,10 @@ def create_crud_resource(
     class CrudViewResource(Resource):
         """Resource to render a template"""
 
-        def get(self) -> typing.ResponseReturnValue:
+        @with_etag(model)
+        def get(self, version: int | None = None) -> typing.ResponseReturnValue:
             """Get all items in db on templated view"""
-            if len(request.args) > 0:
-                query_params = request.args.to_dict()
-                items = get_by_query_args(model, query_params)
-            else:
-                items = fetch_all_data()
-            items_schema = list(map(lambda i: map_item_to_dict(i, False), items))
-            items_schema_html = render_template("table.html", data=items_schema)
-            response = make_response(items_schema_html)
-            response.headers["Content-Type"] = "text/html"
-            return response
+            return render_view(model, schema, request.args.to_dict(), version)
 
     return [CrudBaseResource, CrudIdResource, CrudViewResource]
 
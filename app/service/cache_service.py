@@ -1,37 +1,318 @@
 """Caching service for app"""
 
-from collections.abc import Callable
+from collections import defaultdict
+from collections.abc import Callable, Mapping, Sequence
+from fnmatch import fnmatchcase
 import logging
-from typing import Any
+import threading
+import time
+from typing import Any, Final, NamedTuple, get_type_hints
 
+from flask import Response, current_app, has_app_context
+from sqlmodel import SQLModel
+
+from app.configs.cache_cfg import CacheConfig
 from app.configs.log_cfg import LOG_NAME
 from app.core.cache import app_cache
+from app.core.cache_backends import TieredCache, keeps_timeout_on_inc
+from app.core.cache_stats import app_cache_stats, get_stats_namespace
 
 
 log = logging.getLogger(LOG_NAME)
+GENERATION_KEY: Final[str] = "gen"
+LOCK_KEY: Final[str] = "lock"
+FILTERS_KEY: Final[str] = "filters"
+ADMITTED_KEY: Final[str] = "admitted"
+DISTRIBUTED_LOCK_MODE: Final[str] = "distributed"
+# stored instead of None, since backends return None for a missing key
+NEGATIVE_ENTRY: Final[str] = "__candc:negative__"
+# json: cache the encoded response body, pickle: cache the mapped objects
+JSON_SERIALIZER: Final[str] = "json"
+PICKLE_SERIALIZER: Final[str] = "pickle"
+SERIALIZERS: Final[frozenset[str]] = frozenset({JSON_SERIALIZER, PICKLE_SERIALIZER})
+
+
+def get_model_namespace(model: type[SQLModel]) -> str:
+    """Cache namespace of a model, it matches the model api path"""
+    name = model.__name__
+    return "infantry" if name == "Infantry" else f"{name.lower()}s"
+
+
+def get_row_tag(namespace: str, row_id: Any) -> str:
+    """Tag for the entries built from a single row, e.g. boats-7"""
+    return f"{namespace}-{row_id}"
+
+
+def get_column_tag(namespace: str, column: str, value: Any) -> str:
+    """
+    Tag for the entries filtered by a column value,
+    e.g. boatxfactions-faction_id-3
+    """
+    return f"{namespace}-{column}-{value}"
+
+
+def get_cache_setting(name: str) -> Any:
+    """
+    Read a cache setting from the running app config,
+    falling back to CacheConfig when there is no app context
+    """
+    if has_app_context():
+        return current_app.config.get(name, getattr(CacheConfig, name))
+    return getattr(CacheConfig, name)
+
+
+class CachePolicy(NamedTuple):
+    """How the entries of a namespace are cached"""
+
+    timeout: int
+    negative_timeout: int
+    enabled: bool = True
+    serializer: str = JSON_SERIALIZER
+    # filtered lists cached by generation, any other one is not cached
+    max_filters: int = 100
+
+
+def check_cache_policies(policies: Mapping[str, Any]) -> None:
+    """
+    Validate CACHE_POLICIES once, when the app starts.
+        Args:
+            policies (Mapping): policy fields by namespace or pattern.
+        Raises:
+            ValueError: if a field is unknown, of other type or negative,
+                or the serializer is not json or pickle
+    """
+    field_types = get_type_hints(CachePolicy)
+    for name, policy in policies.items():
+        if not isinstance(policy, dict):
+            raise ValueError(f"CACHE_POLICIES '{name}' should be a json object")
+        for field, value in policy.items():
+            field_type = field_types.get(field)
+            if field_type is None:
+                raise ValueError(
+                    f"CACHE_POLICIES '{name}' has an unknown field '{field}', "
+                    f"use {', '.join(CachePolicy._fields)}"
+                )
+            # a bool is an int for python, true would be a timeout of 1
+            if not isinstance(value, field_type) or (
+                field_type is int and isinstance(value, bool)
+            ):
+                raise ValueError(
+                    f"CACHE_POLICIES '{name}' {field} should be "
+                    f"{field_type.__name__}, got {value!r}"
+                )
+            if field_type is int and value < 0:
+                raise ValueError(
+                    f"CACHE_POLICIES '{name}' {field} should be at least 0, got {value}"
+                )
+        if policy.get("serializer", JSON_SERIALIZER) not in SERIALIZERS:
+            raise ValueError(
+                f"CACHE_POLICIES '{name}' serializer should be one of "
+                f"{', '.join(sorted(SERIALIZERS))}, got '{policy['serializer']}'"
+            )
+
+
+def get_cache_policy(namespace: str) -> CachePolicy:
+    """
+    Policy of a namespace from CACHE_POLICIES, an exact name wins over
+    a pattern like *xfactions. Missing fields use the global timeouts.
+        Args:
+            namespace (str): model namespace, e.g. boats or boats-money.
+        Returns:
+            CachePolicy: timeouts, if it is cached and how it is stored
+    """
+    policies: dict[str, dict[str, Any]] = get_cache_setting("CACHE_POLICIES")
+    policy = policies.get(namespace)
+    if policy is None:
+        policy = next(
+            (
+                value
+                for pattern, value in policies.items()
+                if fnmatchcase(namespace, pattern)
+            ),
+            {},
+        )
+    return CachePolicy(
+        **{
+            "timeout": get_cache_setting("CACHE_DEFAULT_TIMEOUT"),
+            "negative_timeout": get_cache_setting("CACHE_NEGATIVE_TIMEOUT"),
+            "max_filters": get_cache_setting("CACHE_MAX_FILTERS"),
+            **policy,
+        }
+    )
+
+
+class CacheEntry(NamedTuple):
+    """Value stored with its soft timeout, used for stale-while-revalidate"""
+
+    value: Any
+    stale_at: float
+
+
+class _Flight:
+    """A loader running for a key, concurrent callers wait on it"""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.failed = False
 
 
 class CacheService:
     """Allow to manage data in cache"""
 
+    # shared by every service instance, one flight per key in this process
+    _flights: dict[str, _Flight] = {}
+    _flights_lock = threading.Lock()
+    # keys being refreshed in background in this process
+    _refreshing: set[str] = set()
+    # counter bumps of backends whose inc resets the counter timeout
+    _counters_lock = threading.Lock()
+
     def __init__(self) -> None:
         self.cache = app_cache
 
     def get_cache_keys(self) -> list[str]:
         """
-        List all the keys present in cache
+        List all the keys present in cache,
+        only backends that keep an in-process dict are able to list them
+        """
+        return list(getattr(self.cache.cache, "_cache", {}).keys())
+
+    def get_cache_stats(self) -> dict[str, Any]:
+        """
+        Hit, miss and loader latency counters by namespace,
+        plus the entries and bytes the backend holds in this process
+        """
+        backend = self.cache.cache
+        entries: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        for key, entry in list(getattr(backend, "_cache", {}).items()):
+            size = len(entry[1]) if isinstance(entry[1], bytes) else 0
+            entries[get_stats_namespace(key)][0] += 1
+            entries[get_stats_namespace(key)][1] += size
+        counters = app_cache_stats.get_counters()
+        namespaces = {}
+        for namespace in sorted(set(counters) | set(entries)):
+            values = counters.get(namespace, {})
+            loads = int(values.get("loads", 0))
+            namespaces[namespace] = {
+                "hits": int(values.get("hits", 0)),
+                "negative_hits": int(values.get("negative_hits", 0)),
+                "misses": int(values.get("misses", 0)),
+                "coalesced": int(values.get("coalesced", 0)),
+                "stale_hits": int(values.get("stale_hits", 0)),
+                "refreshes": int(values.get("refreshes", 0)),
+                "refresh_failures": int(values.get("refresh_failures", 0)),
+                "rejections": int(values.get("rejections", 0)),
+                "evictions": int(values.get("evictions", 0)),
+                "loads": loads,
+                "load_time_avg_ms": (
+                    round(values.get("load_time", 0) * 1000 / loads, 3) if loads else 0
+                ),
+                "load_time_max_ms": round(values.get("load_time_max", 0) * 1000, 3),
+                "entries": entries[namespace][0],
+                "bytes": entries[namespace][1],
+            }
+        return {
+            "backend": type(backend).__name__,
+            "entries": sum(entry[0] for entry in entries.values()),
+            "bytes": sum(entry[1] for entry in entries.values()),
+            "evictions": getattr(backend, "evictions", None),
+            "namespaces": namespaces,
+        }
+
+    def get_generations(self, *names: str) -> list[int]:
+        """
+        Retrieve the current generation for each namespace or tag.
+        A missing counter is seeded with the current time, so if the
+        backend evicts it the new value never matches an old generation.
+        """
+        generation_keys = [f"{name}:{GENERATION_KEY}" for name in names]
+        generations = list(
+            self.cache.get_many(*generation_keys)  # type: ignore[no-untyped-call]
+        )
+        for index, generation in enumerate(generations):
+            if generation is None:
+                self.cache.add(generation_keys[index], time.time_ns(), timeout=0)
+                generations[index] = self.cache.get(generation_keys[index])
+        return [int(generation or 0) for generation in generations]
+
+    def get_generation(self, namespace: str) -> int:
+        """Retrieve the current generation for a single namespace"""
+        return self.get_generations(namespace)[0]
+
+    def get_cache_key(
+        self, namespace: str, suffix: Any = None, tags: Sequence[str] = ()
+    ) -> str:
+        """
+        Build the key for an entry of the namespace, e.g. boats:g17:7
+        Each tag generation is embedded too, so bumping any of them
+        hides the entry, e.g. boats-money:g3:boats.g17:3
+            Args:
+                namespace (str): group of entries invalidated together.
+                suffix (Any): optional entry identifier inside the namespace.
+                tags (Sequence): other names the entry depends on.
+            Returns:
+                str: key tied to the current generations
+        """
+        generations = self.get_generations(namespace, *tags)
+        cache_key = f"{namespace}:g{generations[0]}"
+        for tag, generation in zip(tags, generations[1:]):
+            cache_key += f":{tag}.g{generation}"
+        return cache_key if suffix is None else f"{cache_key}:{suffix}"
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """
+        Invalidate all the elements in cache that depend on any of the tags.
+        It bumps each generation, so the old entries are not
+        reachable anymore and they age out through normal eviction.
+        A TieredCache bumps them all with a single message to the workers.
         """
-        return list(self.cache.cache._cache.keys())
+        unique_tags = list(dict.fromkeys(tags))
+        self.get_generations(*unique_tags)
+        log.debug("About to bump %s generations in cache", unique_tags)
+        counter_keys = [f"{tag}:{GENERATION_KEY}" for tag in unique_tags]
+        backend = self.cache.cache
+        if isinstance(backend, TieredCache):
+            backend.inc_many(*counter_keys)
+            return
+        for counter_key in counter_keys:
+            self._inc_counter(counter_key)
+
+    def admit_key(self, cache_key: str, base_key: str, max_entries: int) -> bool:
+        """
+        Whether an entry of an unbounded family, like the filtered lists,
+        may be cached. A key admitted before is admitted again, even once
+        its entry expired, a new one only while less than max_entries
+        distinct keys were admitted under base_key.
+            Args:
+                cache_key (str): key of the entry to cache.
+                base_key (str): namespace key the entry belongs to,
+                    its generation resets the count, e.g. boats:g17.
+                max_entries (int): max keys admitted under base_key.
+            Returns:
+                bool: True if the entry should be cached
+        """
+        if self.cache.has(cache_key):
+            return True
+        # the marker and the count live as long as the generation
+        marker_key = f"{cache_key}:{ADMITTED_KEY}"
+        if not self.cache.add(marker_key, 1, timeout=0):
+            return True
+        counter_key = f"{base_key}:{FILTERS_KEY}"
+        self.cache.add(counter_key, 0, timeout=0)
+        admitted = self._inc_counter(counter_key)
+        if admitted is not None and admitted <= max_entries:
+            return True
+        self.cache.delete(marker_key)
+        log.debug("Not caching %s, %s already has its entries", cache_key, base_key)
+        app_cache_stats.incr(get_stats_namespace(cache_key), "rejections")
+        return False
 
     def clear_cache_by_name(self, name: str) -> None:
         """
-        Delete all the elements in cache which starts with name
+        Invalidate all the elements in cache under the name namespace
         """
-        all_keys = self.get_cache_keys()
-        matched_keys = list(filter(lambda key: key.startswith(name), all_keys))
-        for key in matched_keys:
-            log.debug("About to remove %s key from cache", key)
-            self.cache.delete(key)
+        self.invalidate_tags(name)
 
     def clear_cache(self) -> None:
         """
@@ -46,25 +327,267 @@ class CacheService:
         self.cache.delete(cache_key)
 
     def fetch_from_cache_or_else(
-        self, cache_key: str, fun: Callable[..., Any], **kwargs
+        self,
+        cache_key: str,
+        fun: Callable[..., Any],
+        *,
+        policy: CachePolicy | None = None,
+        **kwargs: Any,
     ) -> Any:
         """
         Check data from cache, if present it returns cached data.
         If not present then execute fun, and stores it result in cache,
-        then returns that value.
+        then returns that value. Only one caller per key executes fun,
+        the concurrent ones wait for its result (single-flight).
+        Empty or None results are cached too, using the negative timeout.
+        If CACHE_SOFT_TIMEOUT is set, a value older than it is still returned
+        while a background thread refreshes it, until the hard timeout.
             Args:
                 cache_key (str): key to check cache.
                 fun (Callable): Any callable fun to execute.
+                policy (CachePolicy): policy of the key namespace,
+                    looked up from the key when it is not given.
                 **kwargs: Any additional data to send to fun.
             Returns:
                 Any: cached data or fun result (after cache value)
         """
+        stats_namespace = get_stats_namespace(cache_key)
+        if policy is None:
+            policy = get_cache_policy(stats_namespace)
+        if not policy.enabled:
+            return fun(**kwargs)
         cached_data = self.cache.get(cache_key)
-        if cached_data:
+        if cached_data is not None:
             log.info("Returning data from cache for key: %s", cache_key)
-            return cached_data
+            if (
+                isinstance(cached_data, CacheEntry)
+                and cached_data.stale_at <= time.time()
+            ):
+                app_cache_stats.incr(stats_namespace, "stale_hits")
+                self._refresh_in_background(cache_key, fun, policy, **kwargs)
+            result = CacheService._from_cache_entry(cached_data)
+            app_cache_stats.incr(stats_namespace, "hits" if result else "negative_hits")
+            return result
         log.info("No data found in cache for key: %s", cache_key)
+        app_cache_stats.incr(stats_namespace, "misses")
+        with CacheService._flights_lock:
+            flight = CacheService._flights.get(cache_key)
+            is_leader = flight is None
+            if flight is None:
+                flight = CacheService._flights[cache_key] = _Flight()
+        if not is_leader:
+            return self._wait_for_flight(cache_key, flight, fun, policy, **kwargs)
+        try:
+            # a previous flight may have stored the value after our first read
+            cached_data = self.cache.get(cache_key)
+            if cached_data is not None:
+                flight.result = CacheService._from_cache_entry(cached_data)
+            else:
+                flight.result = self._load_with_lock(cache_key, fun, policy, **kwargs)
+            return flight.result
+        except Exception:
+            flight.failed = True
+            raise
+        finally:
+            with CacheService._flights_lock:
+                CacheService._flights.pop(cache_key, None)
+            flight.done.set()
+
+    def fetch_response_from_cache_or_else(
+        self,
+        cache_key: str,
+        fun: Callable[..., Response | None],
+        *,
+        policy: CachePolicy | None = None,
+        **kwargs: Any,
+    ) -> Response | None:
+        """
+        Same as fetch_from_cache_or_else, but fun builds a response and
+        only its encoded body and mimetype are cached, so a hit
+        does not map or serialize the data again.
+            Args:
+                cache_key (str): key to check cache.
+                fun (Callable): builds the response, None if there is no data.
+                policy (CachePolicy): policy of the key namespace.
+                **kwargs: Any additional data to send to fun.
+            Returns:
+                Response: built from cached body, None if there is no data
+        """
+
+        def render() -> tuple[bytes, str | None] | None:
+            response = fun(**kwargs)
+            if response is None:
+                return None
+            return response.get_data(), response.mimetype
+
+        cached_data = self.fetch_from_cache_or_else(cache_key, render, policy=policy)
+        if cached_data is None:
+            return None
+        body, mimetype = cached_data
+        return Response(body, mimetype=mimetype)
+
+    def _inc_counter(self, counter_key: str) -> int | None:
+        """
+        Increment a counter that never expires, like a generation. When the
+        inc of the backend sets the default timeout, the counter is set
+        again without one under a lock, since those backends are not shared.
+        """
+        backend = self.cache.cache
+        if keeps_timeout_on_inc(backend):
+            return backend.inc(counter_key)
+        with CacheService._counters_lock:
+            value = backend.inc(counter_key)
+            if value is not None:
+                backend.set(counter_key, value, timeout=0)
+            return value
+
+    def _wait_for_flight(
+        self,
+        cache_key: str,
+        flight: _Flight,
+        fun: Callable[..., Any],
+        policy: CachePolicy,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Wait for the loader of this process, if it fails or
+        lock timeout is reached then fun is executed by the caller
+        """
+        log.info("Waiting for concurrent load of key: %s", cache_key)
+        app_cache_stats.incr(get_stats_namespace(cache_key), "coalesced")
+        if flight.done.wait(get_cache_setting("CACHE_LOCK_TIMEOUT")):
+            if not flight.failed:
+                return flight.result
+        else:
+            log.warning("Timeout waiting for concurrent load of key: %s", cache_key)
+        return self._load_and_set(cache_key, fun, policy, **kwargs)
+
+    def _load_with_lock(
+        self,
+        cache_key: str,
+        fun: Callable[..., Any],
+        policy: CachePolicy,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        On distributed mode take a backend lock using add(),
+        so a single worker loads the key and the others poll the cache
+        """
+        if get_cache_setting("CACHE_LOCK_MODE") != DISTRIBUTED_LOCK_MODE:
+            return self._load_and_set(cache_key, fun, policy, **kwargs)
+        lock_key = f"{cache_key}:{LOCK_KEY}"
+        lock_timeout = get_cache_setting("CACHE_LOCK_TIMEOUT")
+        if self.cache.add(lock_key, 1, timeout=max(1, int(lock_timeout))):
+            try:
+                return self._load_and_set(cache_key, fun, policy, **kwargs)
+            finally:
+                self.cache.delete(lock_key)
+        log.info("Key %s is being loaded by another worker", cache_key)
+        poll_interval = get_cache_setting("CACHE_LOCK_POLL_INTERVAL")
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            cached_data = self.cache.get(cache_key)
+            if cached_data is not None:
+                return CacheService._from_cache_entry(cached_data)
+        log.warning("Timeout waiting for worker lock of key: %s", cache_key)
+        return self._load_and_set(cache_key, fun, policy, **kwargs)
+
+    def _refresh_in_background(
+        self,
+        cache_key: str,
+        fun: Callable[..., Any],
+        policy: CachePolicy,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Reload a stale key in a thread, at most one refresh per key runs.
+        On distributed mode a backend lock keeps other workers out too.
+        If the refresh fails the stale value stays until its hard timeout.
+        """
+        with CacheService._flights_lock:
+            if cache_key in CacheService._refreshing:
+                return
+            CacheService._refreshing.add(cache_key)
+        app = (
+            current_app._get_current_object()  # type: ignore[attr-defined]
+            if has_app_context()
+            else None
+        )
+        is_distributed = get_cache_setting("CACHE_LOCK_MODE") == DISTRIBUTED_LOCK_MODE
+        lock_timeout = max(1, int(get_cache_setting("CACHE_LOCK_TIMEOUT")))
+
+        def refresh() -> None:
+            lock_key = f"{cache_key}:{LOCK_KEY}"
+            locked = False
+            try:
+                if is_distributed:
+                    locked = bool(self.cache.add(lock_key, 1, timeout=lock_timeout))
+                    if not locked:
+                        return
+                log.info("Refreshing stale data in cache for key: %s", cache_key)
+                app_cache_stats.incr(get_stats_namespace(cache_key), "refreshes")
+                if app is None:
+                    self._load_and_set(cache_key, fun, policy, **kwargs)
+                else:
+                    with app.app_context():
+                        self._load_and_set(cache_key, fun, policy, **kwargs)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                log.warning(
+                    "Refresh failed for key: %s, serving stale data",
+                    cache_key,
+                    exc_info=exc,
+                )
+                app_cache_stats.incr(get_stats_namespace(cache_key), "refresh_failures")
+            finally:
+                # a failed refresh must not keep other workers out
+                if locked:
+                    self.cache.delete(lock_key)
+                with CacheService._flights_lock:
+                    CacheService._refreshing.discard(cache_key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _load_and_set(
+        self,
+        cache_key: str,
+        fun: Callable[..., Any],
+        policy: CachePolicy,
+        **kwargs: Any,
+    ) -> Any:
+        """Execute fun and store its result in cache"""
+        start = time.perf_counter()
         db_data = fun(**kwargs)
-        log.info("About to set data in cache for key: %s", cache_key)
-        self.cache.set(cache_key, db_data)
+        load_time = time.perf_counter() - start
+        stats_namespace = get_stats_namespace(cache_key)
+        app_cache_stats.incr(stats_namespace, "loads")
+        app_cache_stats.incr(stats_namespace, "load_time", load_time)
+        app_cache_stats.observe_max(stats_namespace, "load_time_max", load_time)
+        if db_data:
+            log.info("About to set data in cache for key: %s", cache_key)
+            soft_timeout = get_cache_setting("CACHE_SOFT_TIMEOUT")
+            if soft_timeout:
+                self.cache.set(
+                    cache_key,
+                    CacheEntry(db_data, time.time() + soft_timeout),
+                    timeout=policy.timeout,
+                )
+            else:
+                self.cache.set(cache_key, db_data, timeout=policy.timeout)
+        else:
+            log.info("About to set negative entry in cache for key: %s", cache_key)
+            self.cache.set(
+                cache_key,
+                NEGATIVE_ENTRY if db_data is None else db_data,
+                timeout=policy.negative_timeout,
+            )
         return db_data
+
+    @staticmethod
+    def _from_cache_entry(cached_data: Any) -> Any:
+        """Map the negative entry back to None and unwrap soft timeout entries"""
+        if isinstance(cached_data, str) and cached_data == NEGATIVE_ENTRY:
+            return None
+        if isinstance(cached_data, CacheEntry):
+            return cached_data.value
+        return cached_data
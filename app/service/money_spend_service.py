@@ -6,11 +6,11 @@ import random
 from collections import Counter
 from typing import Any
 
-from sqlalchemy import select, join
+from sqlalchemy import Select, select, join
 
 from app.configs.log_cfg import LOG_NAME
 from app.error.custom_exc import BadModelException
-from app.models.database import db
+from app.models.database import READ_OPTIONS, db
 from app.models.models import (
     Boat,
     BoatXFaction,
@@ -24,7 +24,13 @@ from app.models.models import (
     TankXFaction,
 )
 from app.models.schemas import MoneySpend, MoneySpendRequest
-from app.service.cache_service import CacheService
+from app.models.snapshots import MoneyOption
+from app.service.cache_service import (
+    CacheService,
+    get_cache_policy,
+    get_column_tag,
+    get_model_namespace,
+)
 
 
 log = logging.getLogger(LOG_NAME)
@@ -56,6 +62,12 @@ switch_model_dict: dict[str, Any] = {
     },
 }
 
+# money options are read by faction from the joined tables,
+# so a write on those rows invalidates the options of its faction
+tag_columns_dict: dict[Any, list[str]] = {
+    data["model_2"]: ["faction_id"] for data in switch_model_dict.values()
+}
+
 
 class MoneySpendService:
     """
@@ -116,21 +128,44 @@ class MoneySpendService:
             Returns:
                 Any data found in cache or db
         """
-        cache_key = f"{model_type}-money-{faction_id}"
+        namespace = f"{model_type}-money"
+        policy = get_cache_policy(namespace)
+        if not policy.enabled:
+            return self.get_data_by_faction_db(faction_id, data_dict)
+        cache_key = self.cache_service.get_cache_key(
+            namespace,
+            faction_id,
+            tags=MoneySpendService.get_cache_tags(faction_id, data_dict),
+        )
+        # rows are always stored as objects, serializer only applies to routes
         return self.cache_service.fetch_from_cache_or_else(
             cache_key,
             self.get_data_by_faction_db,
+            policy=policy,
             faction_id=faction_id,
             data_dict=data_dict,
         )
 
+    @staticmethod
+    def get_cache_tags(faction_id: int, data_dict: dict[str, Any]) -> list[str]:
+        """
+        Tags the money options depend on: any unit row
+        and the joined rows of the faction.
+        """
+        return [
+            get_model_namespace(data_dict["model_1"]),
+            get_column_tag(
+                get_model_namespace(data_dict["model_2"]), "faction_id", faction_id
+            ),
+        ]
+
     def spend_money(
         self, data_options: list[Any], money_to_spend: int
     ) -> dict[str, Any]:
         """
         Retrieves random plane units to build depending on cash.
         """
-        result_list = []
+        result_list: list[str] = []
         cost_list = list(map(MoneySpendService.retrieve_cost, data_options))
         if len(cost_list) > 0:
             lowest_cost: int = min(cost_list)
@@ -152,14 +187,13 @@ class MoneySpendService:
         result_dict = dict(Counter(result_list))
         return MoneySpend(units=result_dict, available_cash=money_to_spend).model_dump()
 
-    def get_data_by_faction_db(self, faction_id: int, data_dict: dict[str, Any]):
-        """
-        Fetch db to get all the boats available for the faction.
-        """
+    @staticmethod
+    def get_money_query(faction_id: int, data_dict: dict[str, Any]) -> Select[Any]:
+        """Active units the faction can build, with their costs"""
         first_model = data_dict.get("model_1")
         second_model = data_dict.get("model_2")
         from_clause = join(first_model, second_model, data_dict.get("on_clause"), True)
-        query_to_run = (
+        return (
             select(
                 first_model.name,
                 first_model.base_cost,
@@ -173,4 +207,14 @@ class MoneySpendService:
                 second_model.faction_id == faction_id,
             )
         )
-        return db.session.execute(query_to_run).fetchall()
+
+    def get_data_by_faction_db(
+        self, faction_id: int, data_dict: dict[str, Any]
+    ) -> list[MoneyOption]:
+        """
+        Fetch db to get all the boats available for the faction.
+        Rows are copied into MoneyOption, so cached options keep no db state.
+        """
+        query_to_run = MoneySpendService.get_money_query(faction_id, data_dict)
+        rows = db.session.execute(query_to_run.execution_options(**READ_OPTIONS))
+        return [MoneyOption(*row) for row in rows]
@@ -0,0 +1,85 @@
+"""Allows to pre-populate the cache before traffic arrives"""
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+import logging
+import time
+from typing import Any
+
+from flask import Flask
+
+from app.configs.log_cfg import LOG_NAME
+from app.models.database import get_all
+from app.models.models import Faction
+from app.service.money_spend_service import MoneySpendService, switch_model_dict
+
+
+log = logging.getLogger(LOG_NAME)
+
+
+class CacheWarmupService:
+    """Run cache loaders in parallel with bounded concurrency"""
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self.money_service = MoneySpendService()
+
+    def get_money_loaders(self) -> dict[str, Callable[[], Any]]:
+        """
+        Loaders for the money options of every active faction.
+        It needs an app context to read the factions.
+        """
+        loaders: dict[str, Callable[[], Any]] = {}
+        for faction in get_all(Faction):
+            faction_id = getattr(faction, "faction_id")
+            for model_type, data_dict in switch_model_dict.items():
+                loaders[f"{model_type}-money-{faction_id}"] = partial(
+                    self.money_service.fetch_cached_data_or_else,
+                    model_type,
+                    faction_id,
+                    data_dict,
+                )
+        return loaders
+
+    @staticmethod
+    def _run_loader(app: Flask, loader: Callable[[], Any]) -> None:
+        with app.app_context():
+            loader()
+
+    def warm(self, app: Flask, loaders: dict[str, Callable[[], Any]]) -> dict[str, Any]:
+        """
+        Execute every loader, each one in its own app context.
+            Args:
+                app (Flask): app that owns the cache and db.
+                loaders (dict): name and function that fills a cache entry.
+            Returns:
+                dict: loaded entries, failed names and elapsed time
+        """
+        start = time.perf_counter()
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(CacheWarmupService._run_loader, app, loader): name
+                for name, loader in loaders.items()
+            }
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    log.warning(
+                        "Cache warmup failed for %s",
+                        futures[future],
+                        exc_info=future.exception(),
+                    )
+                    failed.append(futures[future])
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 3)
+        log.info(
+            "Cache warmup loaded %s entries in %s ms, %s failed",
+            len(loaders) - len(failed),
+            elapsed_ms,
+            len(failed),
+        )
+        return {
+            "loaded": len(loaders) - len(failed),
+            "failed": sorted(failed),
+            "elapsed_ms": elapsed_ms,
+        }
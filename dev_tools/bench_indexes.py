@@ -0,0 +1,162 @@
+"""
+Query plans and timings of the money options and the pages of active
+units, on a synthetic catalog without and with the faction indexes.
+
+    python -m dev_tools.bench_indexes [db url]
+
+The db url defaults to a temporary sqlite file, a postgres url also works
+on an empty db, all the tables are created and dropped by the script.
+"""
+
+from datetime import datetime, timezone
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Final
+
+from sqlalchemy import Boolean, Connection, Select, create_engine, select
+from sqlmodel import SQLModel
+
+from app.models import models
+from app.service.money_spend_service import MoneySpendService, switch_model_dict
+
+
+FACTIONS: Final[int] = 200
+UNITS: Final[int] = 2000
+# factions that can build each unit
+FACTIONS_BY_UNIT: Final[int] = 40
+RUNS: Final[int] = 50
+
+
+def get_page_query(model: Any, after: int) -> Select[Any]:
+    """Same query as a keyset page of the active rows"""
+    primary_key = model.__table__.primary_key.columns.values()[0]
+    return (
+        select(*model.__table__.columns)
+        .where(model.active.is_(True), primary_key > after)
+        .order_by(primary_key)
+        .limit(50)
+    )
+
+
+def fill_catalog(conn: Connection) -> None:
+    """Factions, units and the factions of each unit, 1 in 4 rows inactive"""
+    now = datetime.now(timezone.utc)
+    audit = {"created_at": now, "updated_at": None}
+    conn.execute(
+        models.get_table(models.Game).insert(),
+        [{"game_id": 1, "name": "Synthetic", "active": True, **audit}],
+    )
+    conn.execute(
+        models.get_table(models.Faction).insert(),
+        [
+            {"faction_id": i, "name": f"F{i}", "game_id": 1, "active": True, **audit}
+            for i in range(1, FACTIONS + 1)
+        ],
+    )
+    for data_dict in switch_model_dict.values():
+        unit_table = data_dict["model_1"].__table__
+        link_table = data_dict["model_2"].__table__
+        unit_key = unit_table.primary_key.columns.keys()[0]
+        defaults = {
+            column.key: False
+            for column in unit_table.columns
+            if isinstance(column.type, Boolean)
+        }
+        conn.execute(
+            unit_table.insert(),
+            [
+                {
+                    **defaults,
+                    unit_key: i,
+                    "name": f"U{i}",
+                    "base_cost": 100 + i,
+                    "active": i % 4 != 0,
+                    **audit,
+                }
+                for i in range(1, UNITS + 1)
+            ],
+        )
+        conn.execute(
+            link_table.insert(),
+            [
+                {
+                    "id": (i - 1) * FACTIONS_BY_UNIT + j + 1,
+                    unit_key: i,
+                    "faction_id": (i * 7 + j * (FACTIONS // FACTIONS_BY_UNIT))
+                    % FACTIONS
+                    + 1,
+                    "custom_cost": None,
+                    "active": (i + j) % 4 != 0,
+                    **audit,
+                }
+                for i in range(1, UNITS + 1)
+                for j in range(FACTIONS_BY_UNIT)
+            ],
+        )
+
+
+def get_plan(conn: Connection, query: Select[Any]) -> list[str]:
+    """Plan of the query in the words of the db"""
+    compiled = query.compile(conn, compile_kwargs={"literal_binds": True})
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+        return [row[-1] for row in rows]
+    return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN ANALYZE {compiled}")]
+
+
+def get_time_ms(conn: Connection, query: Select[Any]) -> float:
+    """Average time to read all the rows of the query"""
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        conn.execute(query).all()
+    return (time.perf_counter() - start) * 1000 / RUNS
+
+
+def report(conn: Connection, title: str) -> None:
+    """Print the plan and time of the money and page reads of each unit"""
+    print(f"## {title}")
+    conn.exec_driver_sql("ANALYZE")
+    for name, data_dict in switch_model_dict.items():
+        for label, query in (
+            ("money", MoneySpendService.get_money_query(FACTIONS // 2, data_dict)),
+            ("page", get_page_query(data_dict["model_1"], UNITS // 2)),
+        ):
+            print(f"{name} {label}: {get_time_ms(conn, query):.3f} ms")
+            for line in get_plan(conn, query):
+                print(f"    {line}")
+
+
+def main(url: str) -> None:
+    """Report the reads before and after creating the indexes"""
+    engine = create_engine(url)
+    metadata = SQLModel.metadata
+    indexes = [
+        index
+        for table in metadata.sorted_tables
+        for index in table.indexes
+        if str(index.name).endswith("_faction_id_active")
+    ]
+    metadata.create_all(engine)
+    try:
+        with engine.begin() as conn:
+            for index in indexes:
+                index.drop(conn)
+            fill_catalog(conn)
+        with engine.begin() as conn:
+            report(conn, "before")
+            for index in indexes:
+                index.create(conn)
+            report(conn, "after")
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1])
+    else:
+        with tempfile.TemporaryDirectory() as folder:
+            main(f"sqlite:///{os.path.join(folder, 'bench.db')}")
@@ -0,0 +1,15 @@
+"""Gunicorn settings, loaded by default from the working directory"""
+
+from typing import Any
+
+
+def post_worker_init(worker: Any) -> None:
+    """
+    Warm the cache of each worker once its app is loaded,
+    post_fork would run before the worker imports the app
+    """
+    if worker.wsgi.config.get("CACHE_WARMUP") == "worker":
+        # pylint: disable=import-outside-toplevel
+        from app.core.cli import warm_app_cache
+
+        warm_app_cache(worker.wsgi)
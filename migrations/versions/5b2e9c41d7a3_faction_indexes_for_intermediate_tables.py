@@ -0,0 +1,40 @@
+"""Faction indexes for intermediate tables
+
+Revision ID: 5b2e9c41d7a3
+Revises: d87943ac79b1
+Create Date: 2026-10-18 14:10:32.418207
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "5b2e9c41d7a3"
+down_revision = "d87943ac79b1"
+branch_labels = None
+depends_on = None
+
+# the unique constraints lead with the unit id, lookups by faction can't use them
+TABLES = [
+    "boatxfaction",
+    "infantryxfaction",
+    "planexfaction",
+    "structurexfaction",
+    "tankxfaction",
+]
+
+
+def upgrade():
+    for table in TABLES:
+        op.create_index(
+            f"ix_{table}_faction_id_active",
+            table,
+            ["faction_id", "active"],
+            unique=False,
+        )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index(f"ix_{table}_faction_id_active", table_name=table)
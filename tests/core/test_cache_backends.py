@@ -0,0 +1,178 @@
+"""Test for custom cache backends"""
+
+import os
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from flask_caching.backends.filesystemcache import FileSystemCache
+
+from app.core.cache_backends import (
+    AtomicFileSystemCache,
+    InvalidationChannel,
+    LruCache,
+    TieredCache,
+)
+
+
+class TestLruCache(TestCase):
+    """Test cases for LruCache class"""
+
+    def setUp(self) -> None:
+        """Init cache with a small bound"""
+        self.cache = LruCache(max_entries=2)
+
+    def test_set_and_get(self) -> None:
+        """Test case for set and get a copy of the value"""
+        value = [{"boat_id": 1}]
+        self.cache.set("boats", value)
+        value.append({"boat_id": 2})
+        self.assertEqual([{"boat_id": 1}], self.cache.get("boats"))
+
+    def test_evict_least_recently_used(self) -> None:
+        """Test case for eviction once max_entries is reached"""
+        self.cache.set("boats", 1)
+        self.cache.set("tanks", 2)
+        self.cache.get("boats")
+        self.cache.set("planes", 3)
+        self.assertEqual(1, self.cache.get("boats"))
+        self.assertIsNone(self.cache.get("tanks"))
+        self.assertEqual(3, self.cache.get("planes"))
+
+    def test_evict_by_bytes(self) -> None:
+        """Test case for eviction once max_bytes is reached"""
+        cache = LruCache(max_entries=10, max_bytes=300)
+        cache.set("boats", "a" * 100)
+        cache.set("tanks", "b" * 100)
+        cache.get("boats")
+        cache.set("planes", "c" * 100)
+        self.assertIsNotNone(cache.get("boats"))
+        self.assertIsNone(cache.get("tanks"))
+        self.assertIsNotNone(cache.get("planes"))
+        self.assertEqual(1, cache.evictions)
+        self.assertLessEqual(cache.current_bytes, 300)
+
+    def test_set_too_big(self) -> None:
+        """Test case for an entry bigger than max_bytes"""
+        cache = LruCache(max_bytes=100)
+        self.assertFalse(cache.set("boats", "a" * 200))
+        self.assertIsNone(cache.get("boats"))
+        self.assertEqual(0, cache.current_bytes)
+
+    def test_delete_and_clear_release_bytes(self) -> None:
+        """Test case for bytes released on delete and clear"""
+        self.cache.set("boats", "a" * 100)
+        self.cache.set("boats", "a" * 50)
+        size = self.cache.current_bytes
+        self.cache.set("tanks", "b")
+        self.cache.delete("tanks")
+        self.assertEqual(size, self.cache.current_bytes)
+        self.cache.clear()
+        self.assertEqual(0, self.cache.current_bytes)
+
+    def test_add_and_inc(self) -> None:
+        """Test case for add and inc"""
+        self.assertTrue(self.cache.add("boats:gen", 1))
+        self.assertFalse(self.cache.add("boats:gen", 5))
+        self.assertEqual(2, self.cache.inc("boats:gen"))
+
+    def test_inc_keeps_timeout(self) -> None:
+        """Test case for a counter without timeout, inc must not give it one"""
+        self.cache.add("boats:gen", 1, timeout=0)
+        self.cache.inc("boats:gen")
+        later = time.time() + 2 * self.cache.default_timeout
+        with patch("app.core.cache_backends.time.time", return_value=later):
+            self.assertEqual(2, self.cache.get("boats:gen"))
+
+
+class TestTieredCache(TestCase):
+    """Test cases for TieredCache class, each instance emulates a worker"""
+
+    def setUp(self) -> None:
+        """Init two workers sharing the same L2"""
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._cache_dir = os.path.join(self._tmp_dir.name, "l2")
+        self.worker_a = self.create_worker()
+        self.worker_b = self.create_worker()
+
+    def tearDown(self) -> None:
+        """Remove L2 files"""
+        self._tmp_dir.cleanup()
+
+    def create_worker(self) -> TieredCache:
+        """Build a tiered cache on top of the shared directory"""
+        l2 = AtomicFileSystemCache(self._cache_dir)  # type: ignore[no-untyped-call]
+        return TieredCache(LruCache(), l2, InvalidationChannel(l2), sync_interval=0)
+
+    def test_get_from_l2(self) -> None:
+        """Test case for get a value set by other worker"""
+        self.worker_a.set("boats", [1])
+        self.assertEqual([1], self.worker_b.get("boats"))
+        self.assertEqual([1], self.worker_b.l1.get("boats"))
+
+    def test_delete_is_broadcast(self) -> None:
+        """Test case for delete dropping the L1 copy of other worker"""
+        self.worker_a.set("boats", [1])
+        self.worker_b.get("boats")
+        self.worker_a.delete("boats")
+        self.assertIsNone(self.worker_b.get("boats"))
+
+    def test_inc_is_broadcast(self) -> None:
+        """Test case for a generation bump seen by other worker"""
+        self.worker_a.add("boats:gen", 1, timeout=0)
+        self.assertEqual([1], self.worker_b.get_many("boats:gen"))
+        self.worker_a.inc("boats:gen")
+        self.assertEqual([2], self.worker_b.get_many("boats:gen"))
+
+    def test_inc_many_is_broadcast(self) -> None:
+        """Test case for several bumps seen by other worker as one message"""
+        self.worker_a.add("boats:gen", 1, timeout=0)
+        self.worker_b.get_many("boats:gen")
+        sequence = self.worker_b.channel.last_sequence
+        self.worker_a.inc_many("boats:gen", "boats-7:gen")
+        self.assertEqual([2, 1], self.worker_b.get_many("boats:gen", "boats-7:gen"))
+        self.assertEqual(sequence + 1, self.worker_b.channel.last_sequence)
+
+    def test_clear_is_broadcast(self) -> None:
+        """Test case for clear dropping every L1 entry of other worker"""
+        self.worker_a.set("boats", [1])
+        self.worker_a.set("tanks", [2])
+        self.worker_b.get_many("boats", "tanks")
+        self.worker_a.clear()
+        self.assertEqual([None, None], self.worker_b.get_many("boats", "tanks"))
+
+    def test_concurrent_inc(self) -> None:
+        """Test case for workers bumping a counter at once, no bump is lost"""
+        self.worker_a.add("boats:gen", 0, timeout=0)
+        values: list[int | None] = []
+
+        def bump(worker: TieredCache) -> None:
+            for _ in range(25):
+                values.append(worker.inc("boats:gen"))
+
+        threads = [
+            threading.Thread(target=bump, args=(worker,))
+            for worker in (self.worker_a, self.worker_b) * 2
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(list(range(1, 101)), sorted(value or 0 for value in values))
+        self.assertEqual([100], self.worker_b.get_many("boats:gen"))
+
+    def test_inc_keeps_timeout(self) -> None:
+        """Test case for a counter of the L2 that outlives the default timeout"""
+        self.worker_a.add("boats:gen", 1, timeout=0)
+        self.worker_a.inc("boats:gen")
+        later = time.time() + 2 * self.worker_a.l2.default_timeout
+        with patch("cachelib.file.time", return_value=later):
+            self.assertEqual(2, self.worker_b.l2.get("boats:gen"))
+
+    def test_l2_needs_atomic_inc(self) -> None:
+        """Test case for an L2 that runs inc as a get and a set"""
+        l2 = FileSystemCache(self._cache_dir)  # type: ignore[no-untyped-call]
+        with self.assertRaises(ValueError):
+            TieredCache(LruCache(), l2, InvalidationChannel(l2))
@@ -0,0 +1,45 @@
+"""Test for cache stats counters"""
+
+import threading
+from unittest import TestCase
+
+from app.core.cache_stats import CacheStats
+
+
+class TestCacheStats(TestCase):
+    """Test cases for CacheStats class"""
+
+    def setUp(self) -> None:
+        """Init empty stats"""
+        self.stats = CacheStats()
+
+    def test_get_counters_from_threads(self) -> None:
+        """Test case for aggregate counters written by several threads"""
+
+        def record(load_time: float) -> None:
+            self.stats.incr("boats", "hits")
+            self.stats.incr("boats", "load_time", load_time)
+            self.stats.observe_max("boats", "load_time_max", load_time)
+
+        threads = [threading.Thread(target=record, args=(n,)) for n in range(1, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        record(0.5)
+        counters = self.stats.get_counters()
+        self.assertEqual(4, counters["boats"]["hits"])
+        self.assertEqual(6.5, counters["boats"]["load_time"])
+        self.assertEqual(3, counters["boats"]["load_time_max"])
+
+    def test_counters_of_finished_threads(self) -> None:
+        """Test case for short lived threads, their counters are folded"""
+        for _ in range(200):
+            thread = threading.Thread(target=self.stats.incr, args=("boats", "hits"))
+            thread.start()
+            thread.join()
+        self.stats.observe_max("boats", "load_time_max", 0.5)
+        self.assertLessEqual(len(self.stats._live_counters), 1)
+        counters = self.stats.get_counters()
+        self.assertEqual(200, counters["boats"]["hits"])
+        self.assertEqual(0.5, counters["boats"]["load_time_max"])
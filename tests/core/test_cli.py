@@ -0,0 +1,18 @@
+"""Test for flask cli commands"""
+
+import json
+from typing import cast
+
+from flask import Flask
+
+
+def test_cache_warm(app: Flask) -> None:
+    """Test case for cache warm command"""
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["cache", "warm"])
+    assert result.exit_code == 0
+    assert "0 failed" in result.output
+    client = app.test_client()
+    stats = json.loads(cast(bytes, client.get("/api/cache/stats").data))
+    assert stats["namespaces"]["boats"]["entries"] >= 1
+    assert stats["namespaces"]["boats-money"]["entries"] >= 1
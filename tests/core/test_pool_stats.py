@@ -0,0 +1,54 @@
+"""Test for db pool config and stats"""
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.configs.db.database_cfg import PoolConfig, get_pool_config
+from app.core.pool_stats import InstrumentedQueuePool, app_pool_stats
+
+
+def test_get_pool_config() -> None:
+    """Test case for the typed settings, missing ones use the defaults"""
+    config = get_pool_config(
+        {"POOL_SIZE": "10", "POOL_TIMEOUT": "2.5", "POOL_PRE_PING": "true"}
+    )
+    assert config == PoolConfig(size=10, timeout=2.5, pre_ping=True)
+    assert config.get_engine_options()["poolclass"] is InstrumentedQueuePool
+
+
+@pytest.mark.parametrize(
+    "env",
+    [
+        {"POOL_SIZE": "ten"},
+        {"POOL_SIZE": "0"},
+        {"POOL_MAX_OVERFLOW": "-2"},
+        {"POOL_PRE_PING": "maybe"},
+    ],
+)
+def test_get_pool_config_not_valid(env: dict[str, str]) -> None:
+    """Test case for the app not starting with a bad pool setting"""
+    with pytest.raises(ValueError, match=next(iter(env))):
+        get_pool_config(env)
+
+
+def test_pool_stats(tmp_path: Path) -> None:
+    """Test case for the checkouts, connects and timeouts of a full pool"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        **PoolConfig(size=1, max_overflow=0, timeout=0.05).get_engine_options(),
+    )
+    app_pool_stats.watch(engine, "test-pool")
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        stats = app_pool_stats.get_stats({"test-pool": engine})["test-pool"]
+    assert stats["checked_out"] == 1
+    assert stats["overflow"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["connects"] == 1
+    assert stats["timeouts"] == 1
+    engine.dispose()
+    assert engine.pool.stats_name == "test-pool"  # type: ignore[attr-defined]
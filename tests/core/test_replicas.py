@@ -0,0 +1,82 @@
+"""Test for read replica routing"""
+
+from http import HTTPStatus
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import cast
+
+from flask import Flask
+import pytest
+
+from app.core.cache import app_cache
+from app.core.replicas import EXTENSION_NAME, app_replicas
+from app.models.database import db
+
+
+@pytest.fixture
+def replica_app(app: Flask, tmp_path: Path) -> Flask:
+    """App reading from a copy of the test db, where boat 1 was renamed"""
+    replica_path = tmp_path / "replica.db"
+    shutil.copy(str(db.engine.url.database), replica_path)
+    with sqlite3.connect(replica_path) as conn:
+        conn.execute("UPDATE boat SET name = 'Replica Boat' WHERE boat_id = 1")
+    app.config["CACHE_POLICIES"] = {"boats": {"enabled": False}}
+    # replicas need a cache shared by the workers
+    app.config["CACHE_TYPE"] = "app.core.cache_backends.AtomicFileSystemCache"
+    app.config["CACHE_DIR"] = str(tmp_path / "cache")
+    app_cache.init_app(app)
+    app.config["SQLALCHEMY_REPLICA_URIS"] = [f"sqlite:///{replica_path}"]
+    app_replicas.init_app(app)
+    return app
+
+
+def test_replicas_need_shared_cache(app: Flask) -> None:
+    """Test case for replicas with a cache of each worker, marks are lost"""
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    app_cache.init_app(app)
+    app.config["SQLALCHEMY_REPLICA_URIS"] = ["sqlite:////tmp/replica.db"]
+    with pytest.raises(ValueError, match="CACHE_TYPE"):
+        app_replicas.init_app(app)
+
+
+def test_read_from_replica(replica_app: Flask) -> None:
+    """Test case for GET reads served by the replica"""
+    client = replica_app.test_client()
+    response = client.get("/api/boats/1")
+    assert json.loads(cast(bytes, response.data))["name"] == "Replica Boat"
+    response = client.get("/api/boats?boat_id__in=1,2")
+    names = [item["name"] for item in json.loads(cast(bytes, response.data))]
+    assert "Replica Boat" in names
+    assert app_replicas.get_status() == {"replica-0": True}
+
+
+def test_read_after_write(replica_app: Flask) -> None:
+    """Test case for reads right after a write, they go to the primary"""
+    client = replica_app.test_client()
+    name = json.loads(cast(bytes, client.get("/api/boats/2").data))["name"]
+    client.patch("/api/boats/2", json={"name": f"{name} Test"})
+    response = client.get("/api/boats/2")
+    assert json.loads(cast(bytes, response.data))["name"] == f"{name} Test"
+    client.patch("/api/boats/2", json={"name": name})
+
+
+def test_replica_ejected(replica_app: Flask) -> None:
+    """
+    Test case for a replica that fails its health check or a read,
+    the failed read is run on the primary
+    """
+    replica_app.config["SQLALCHEMY_REPLICA_URIS"] = ["sqlite:////non-existent/x.db"]
+    app_replicas.init_app(replica_app)
+    client = replica_app.test_client()
+    response = client.get("/api/boats/1")
+    assert response.status_code == HTTPStatus.OK.value
+    assert json.loads(cast(bytes, response.data))["name"] != "Replica Boat"
+    assert app_replicas.get_status() == {"replica-0": False}
+    assert client.get("/api/boats/1").status_code == HTTPStatus.OK.value
+    replica = replica_app.extensions[EXTENSION_NAME].replicas[0]
+    replica.checked_at = float("-inf")
+    response = client.get("/api/boats/1")
+    assert response.status_code == HTTPStatus.OK.value
+    assert app_replicas.get_status() == {"replica-0": False}
@@ -0,0 +1,58 @@
+"""Test for table version counters"""
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from app.core.table_versions import (
+    bump_table_version,
+    get_table_version,
+    has_shared_versions,
+)
+
+
+class TestTableVersions(TestCase):
+    """Test cases for table version functions"""
+
+    def setUp(self) -> None:
+        """Set up cache patch"""
+        self._cache_patch = patch("app.core.table_versions.app_cache")
+        self._cache_mock: Mock = self._cache_patch.start()
+        self._versions_mock: Mock = self._cache_mock.cache
+        del self._versions_mock.l2
+
+    def tearDown(self) -> None:
+        """Stop all patches."""
+        self._cache_patch.stop()
+
+    def test_get_table_version_is_present(self) -> None:
+        """Test case for get_table_version when counter exists"""
+        self._versions_mock.get.return_value = 17
+        self.assertEqual(17, get_table_version("boat"))
+        self._versions_mock.add.assert_not_called()
+
+    def test_get_table_version_is_empty(self) -> None:
+        """Test case for get_table_version when counter must be seeded"""
+        self._versions_mock.get.side_effect = [None, 42]
+        self.assertEqual(42, get_table_version("boat"))
+        self._versions_mock.add.assert_called_once()
+
+    def test_bump_table_version(self) -> None:
+        """Test case for bump_table_version"""
+        self._versions_mock.get.return_value = 17
+        bump_table_version("boat")
+        self._versions_mock.inc.assert_called_once_with("boat:version")
+
+    def test_get_table_version_of_tiered_cache(self) -> None:
+        """Test case for get_table_version reading the shared level"""
+        self._versions_mock.l2 = Mock()
+        self._versions_mock.l2.get.return_value = 17
+        self.assertEqual(17, get_table_version("boat"))
+        self._versions_mock.get.assert_not_called()
+
+    def test_has_shared_versions(self) -> None:
+        """Test case for has_shared_versions with the backend of the cache"""
+        with patch(
+            "app.core.table_versions.is_shared_backend", return_value=False
+        ) as shared_mock:
+            self.assertFalse(has_shared_versions())
+            shared_mock.assert_called_once_with(self._cache_mock.cache)
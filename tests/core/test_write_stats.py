@@ -0,0 +1,25 @@
+"""Test for db write stats"""
+
+from unittest import TestCase
+
+from app.core.write_stats import WriteStats
+
+
+class TestWriteStats(TestCase):
+    """Test cases for WriteStats class"""
+
+    def setUp(self) -> None:
+        """Init empty stats"""
+        self.stats = WriteStats()
+
+    def test_track(self) -> None:
+        """Test case for only the round trips inside the block counted"""
+        self.stats.count_round_trip()
+        for _ in range(2):
+            with self.stats.track("boat", "save"):
+                self.stats.count_round_trip()
+                self.stats.count_round_trip()
+        self.assertEqual(
+            {"boat": {"save": {"writes": 2, "round_trips": 4, "round_trips_avg": 2}}},
+            self.stats.get_stats(),
+        )
@@ -0,0 +1,30 @@
+"""Test for db read helpers"""
+
+from flask import Flask
+from sqlalchemy import Row
+
+from app.models.database import db, get_all, get_by_id, get_row_by_id
+from app.models.models import Boat
+from app.models.schemas import BoatBase
+from app.models.snapshots import to_snapshot
+
+
+def test_reads_untracked(app: Flask) -> None:
+    """Test case for reads returning rows the session does not track"""
+    rows = get_all(Boat)
+    row = get_row_by_id(Boat, 1)
+    assert isinstance(row, Row)
+    assert all(isinstance(item, Row) for item in rows)
+    assert len(db.session().identity_map) == 0
+    item = get_by_id(Boat, 1)
+    assert item is not None
+    assert to_snapshot(row, BoatBase) == to_snapshot(item, BoatBase)
+    assert len(db.session().identity_map) == 1
+
+
+def test_get_row_by_id_fields(app: Flask) -> None:
+    """Test case for a read of only some columns"""
+    row = get_row_by_id(Boat, 1, ["boat_id", "name"])
+    assert row is not None
+    assert row._fields == ("boat_id", "name")
+    assert get_row_by_id(Boat, 9999) is None
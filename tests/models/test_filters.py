@@ -0,0 +1,69 @@
+"""Test for typed query filters"""
+
+from unittest import TestCase
+
+from app.error.custom_exc import BadArgException
+from app.models.filters import (
+    compile_filters,
+    get_filter_key,
+    parse_filters,
+    to_bool,
+    to_prefix,
+)
+from app.models.models import Boat
+
+
+class TestFilters(TestCase):
+    """Test cases for filter parsing and compiling"""
+
+    def test_parse_filters(self) -> None:
+        """Test case for values read with the column type"""
+        query_filter = parse_filters(
+            Boat, {"name__prefix": "Dol", "base_cost__lte": "800", "boat_id__in": "1,2"}
+        )
+        self.assertEqual(
+            (("base_cost", "lte"), ("boat_id", "in"), ("name", "prefix")),
+            query_filter.signature,
+        )
+        self.assertEqual(800, query_filter.values["base_cost__lte"])
+        self.assertEqual([1, 2], query_filter.values["boat_id__in"])
+
+    def test_parse_filters_invalid(self) -> None:
+        """Test case for unknown columns, operators and values"""
+        for data in (
+            {"non_valid": "1"},
+            {"name__like": "Dol"},
+            {"build_limit__gt": "1"},
+            {"base_cost": "cheap"},
+        ):
+            with self.assertRaises(BadArgException):
+                parse_filters(Boat, data)
+
+    def test_compile_filters_cached(self) -> None:
+        """Test case for the same clauses reused by equal signatures"""
+        first = parse_filters(Boat, {"boat_id": "1", "name": "Dolphin"})
+        second = parse_filters(Boat, {"name": "Sub", "boat_id": "2"})
+        self.assertEqual(first.signature, second.signature)
+        self.assertIs(
+            compile_filters(Boat, first.signature),
+            compile_filters(Boat, second.signature),
+        )
+
+    def test_get_filter_key(self) -> None:
+        """Test case for the same key for any order of args and values"""
+        first = parse_filters(Boat, {"boat_id__in": "2,1", "base_cost": "800"})
+        second = parse_filters(Boat, {"base_cost": "0800", "boat_id__in": "1,2,1"})
+        third = parse_filters(Boat, {"base_cost": "800", "boat_id__in": "1,3"})
+        self.assertEqual(get_filter_key(first), get_filter_key(second))
+        self.assertNotEqual(get_filter_key(first), get_filter_key(third))
+
+    def test_to_bool(self) -> None:
+        """Test case for the boolean flags"""
+        self.assertTrue(to_bool("True"))
+        self.assertFalse(to_bool("0"))
+        with self.assertRaises(ValueError):
+            to_bool("maybe")
+
+    def test_to_prefix(self) -> None:
+        """Test case for like wildcards escaped"""
+        self.assertEqual("50/%", to_prefix("50%"))
@@ -0,0 +1,40 @@
+"""Test for row snapshots"""
+
+import pickle
+from typing import Any
+from unittest import TestCase
+
+from app.models import snapshots
+from app.models.models import Boat
+from app.models.schemas import BoatBase
+from app.models.snapshots import get_snapshot_type, snapshot_to_dict, to_snapshot
+
+
+class TestSnapshots(TestCase):
+    """Test cases for snapshot helpers"""
+
+    @staticmethod
+    def get_boat() -> Boat:
+        """Boat as read from db"""
+        return Boat(boat_id=7, name="Dolphin", base_cost=1000, updated_at=None)
+
+    def test_to_snapshot(self) -> None:
+        """Test case for to_snapshot keeping the schema fields"""
+        snapshot: Any = to_snapshot(TestSnapshots.get_boat(), BoatBase)
+        self.assertIsInstance(snapshot, get_snapshot_type(BoatBase))
+        self.assertEqual(7, snapshot.boat_id)
+        self.assertEqual("Dolphin", snapshot.name)
+        self.assertEqual(None, snapshot_to_dict(snapshot).get("notes"))
+        self.assertIn("notes", snapshot_to_dict(snapshot, exclude_none=False))
+
+    def test_snapshot_pickle(self) -> None:
+        """Test case for snapshots read back by a worker that never built them"""
+        snapshot = to_snapshot(TestSnapshots.get_boat(), BoatBase)
+        data = pickle.dumps(snapshot)
+        get_snapshot_type.cache_clear()
+        self.assertEqual(snapshot, pickle.loads(data))
+
+    def test_getattr_unknown(self) -> None:
+        """Test case for a missing attribute in snapshots module"""
+        with self.assertRaises(AttributeError):
+            getattr(snapshots, "UnknownSnapshot")
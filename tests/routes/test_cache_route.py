@@ -19,6 +19,21 @@ def test_check_cache_keys(app: Flask) -> None:
     assert data == []
 
 
+def test_cache_stats(app: Flask) -> None:
+    """Test case for cache_stats"""
+    client = app.test_client()
+    client.get("/api/boats")
+    client.get("/api/boats")
+    response = client.get("/api/cache/stats")
+    assert response.status_code == HTTPStatus.OK.value
+    data_bytes: bytes = cast(bytes, response.data)
+    data = json.loads(data_bytes.decode(helper.UTF_8))
+    assert data["entries"] > 0
+    assert data["namespaces"]["boats"]["hits"] >= 1
+    assert data["namespaces"]["boats"]["loads"] >= 1
+    assert data["namespaces"]["boats"]["bytes"] > 0
+
+
 def test_clear_cache(app: Flask) -> None:
     """Test case for clear_cache"""
     client = app.test_client()
@@ -2,13 +2,45 @@
 
 from http import HTTPStatus
 import json
+from pathlib import Path
 from typing import cast
 
+from unittest.mock import Mock
+
 from flask import Flask
+import pytest
+from pytest import MonkeyPatch
 
+from app.configs.lazy_cfg_loader import LazyImporter
+from app.core.cache import app_cache
+from app.core.table_versions import (
+    bump_table_version,
+    get_table_version,
+    has_shared_versions,
+)
+from app.models import database
+from app.routes.models import crud
+from app.service.cache_service import CacheService
 import tests.test_helper as helper
 
 
+def use_shared_cache(app: Flask, cache_dir: Path) -> Flask:
+    """Cache of the app shared with every app using cache_dir, like workers"""
+    with app.app_context():
+        if has_shared_versions():
+            return app
+    app.config["CACHE_TYPE"] = "app.core.cache_backends.AtomicFileSystemCache"
+    app.config["CACHE_DIR"] = str(cache_dir)
+    app_cache.init_app(app)
+    return app
+
+
+@pytest.fixture
+def shared_app(app: Flask, tmp_path: Path) -> Flask:
+    """App with a cache shared by the workers, etags need it"""
+    return use_shared_cache(app, tmp_path / "cache")
+
+
 def test_get_all(app: Flask) -> None:
     """Test case for get all"""
     client = app.test_client()
@@ -19,6 +51,220 @@ def test_get_all(app: Flask) -> None:
     assert len(data) > 0
 
 
+def test_get_all_cached(app: Flask) -> None:
+    """Test case for get all served from the cached response"""
+    client = app.test_client()
+    response = client.get("/api/boats")
+    cached_response = client.get("/api/boats")
+    assert cached_response.status_code == HTTPStatus.OK.value
+    assert cached_response.mimetype == "application/json"
+    assert cached_response.data == response.data
+
+
+def test_get_all_cached_objects(app: Flask) -> None:
+    """Test case for get all when the policy caches the mapped objects"""
+    app.config["CACHE_POLICIES"] = {"boats": {"serializer": "pickle"}}
+    client = app.test_client()
+    response = client.get("/api/boats")
+    cached_response = client.get("/api/boats")
+    assert cached_response.status_code == HTTPStatus.OK.value
+    assert json.loads(cached_response.data) == json.loads(response.data)
+
+
+def test_get_all_not_cached(app: Flask) -> None:
+    """Test case for get all when the policy disables the cache"""
+    app.config["CACHE_POLICIES"] = {"boats": {"enabled": False}}
+    client = app.test_client()
+    response = client.get("/api/boats")
+    assert response.status_code == HTTPStatus.OK.value
+    keys = json.loads(cast(bytes, client.get("/api/cache/keys").data))
+    assert not [key for key in keys if key.startswith("boats")]
+
+
+def test_get_all_page(app: Flask) -> None:
+    """Test case for get all using keyset pagination"""
+    client = app.test_client()
+    response = client.get("/api/boats?limit=2")
+    assert response.status_code == HTTPStatus.OK.value
+    data = json.loads(cast(bytes, response.data))
+    assert len(data["items"]) == 2
+    assert data["next"] == data["items"][-1]["boat_id"]
+    next_response = client.get(f"/api/boats?limit=2&after={data['next']}")
+    next_data = json.loads(cast(bytes, next_response.data))
+    next_ids = [item["boat_id"] for item in next_data["items"]]
+    assert all(boat_id > data["next"] for boat_id in next_ids)
+    assert client.get("/api/boats?limit=2").data == response.data
+
+
+def test_get_all_last_page(app: Flask) -> None:
+    """Test case for get all after the last row"""
+    client = app.test_client()
+    response = client.get("/api/boats?limit=5&after=9999")
+    assert response.status_code == HTTPStatus.OK.value
+    assert json.loads(cast(bytes, response.data)) == {"items": [], "next": None}
+
+
+def test_get_all_page_filter(app: Flask) -> None:
+    """Test case for get all using filter and pagination"""
+    client = app.test_client()
+    response = client.get("/api/boats?boat_id=16&limit=1")
+    assert response.status_code == HTTPStatus.OK.value
+    data = json.loads(cast(bytes, response.data))
+    assert [item["boat_id"] for item in data["items"]] == [16]
+    response = client.get("/api/boats?boat_id=16&limit=1&after=16")
+    assert json.loads(cast(bytes, response.data)) == {"items": [], "next": None}
+
+
+def test_get_view_page(app: Flask) -> None:
+    """Test case for the templated view using pagination"""
+    client = app.test_client()
+    response = client.get("/api/boats/view?limit=2")
+    assert response.status_code == HTTPStatus.OK.value
+    assert b"/api/boats/view?limit=2&amp;after=" in response.data
+
+
+def test_get_all_page_wrong_limit(app: Flask) -> None:
+    """Test case for get all using a non valid page size"""
+    client = app.test_client()
+    response = client.get("/api/boats?limit=0")
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    response = client.get("/api/boats?limit=2&after=abc")
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+
+
+def test_get_all_fields(app: Flask) -> None:
+    """Test case for get all returning only some fields"""
+    client = app.test_client()
+    response = client.get("/api/boats?fields=name,base_cost")
+    assert response.status_code == HTTPStatus.OK.value
+    data = json.loads(cast(bytes, response.data))
+    assert set(data[0].keys()) == {"boat_id", "name", "base_cost"}
+    full_response = client.get("/api/boats")
+    assert "active" in json.loads(cast(bytes, full_response.data))[0]
+    cached_response = client.get("/api/boats?fields=base_cost,name")
+    assert cached_response.data == response.data
+
+
+def test_get_all_fields_page(app: Flask) -> None:
+    """Test case for get a page returning only some fields"""
+    client = app.test_client()
+    response = client.get("/api/boats?fields=name&limit=2")
+    assert response.status_code == HTTPStatus.OK.value
+    data = json.loads(cast(bytes, response.data))
+    assert set(data["items"][0].keys()) == {"boat_id", "name"}
+    assert data["next"] == data["items"][-1]["boat_id"]
+
+
+def test_get_all_wrong_fields(app: Flask) -> None:
+    """Test case for get all using a field that is not a column"""
+    client = app.test_client()
+    response = client.get("/api/boats?fields=name,speed")
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+
+
+def test_get_all_not_modified(shared_app: Flask) -> None:
+    """Test case for get all using the etag of a previous response"""
+    client = shared_app.test_client()
+    response = client.get("/api/boats")
+    etag = response.headers["ETag"]
+    assert etag.startswith('"')
+    cached_response = client.get("/api/boats", headers={"If-None-Match": etag})
+    assert cached_response.status_code == HTTPStatus.NOT_MODIFIED.value
+    assert cached_response.headers["ETag"] == etag
+    assert client.get("/api/boats?limit=2").headers["ETag"] != etag
+    bump_table_version("boat")
+    response = client.get("/api/boats", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK.value
+    assert response.headers["ETag"] != etag
+
+
+def test_get_all_reads_version_once(
+    shared_app: Flask, monkeypatch: MonkeyPatch
+) -> None:
+    """Test case for the etag and the cache key using the same version read"""
+    read_version = Mock(wraps=get_table_version)
+    monkeypatch.setattr(crud, "get_table_version", read_version)
+    client = shared_app.test_client()
+    for path in ["/api/boats", "/api/boats/1", "/api/boats/view"]:
+        read_version.reset_mock()
+        assert client.get(path).status_code == HTTPStatus.OK.value
+        read_version.assert_called_once_with("boat")
+
+
+def test_get_by_id_not_modified(shared_app: Flask) -> None:
+    """Test case for get by id and view using the etag of a previous response"""
+    client = shared_app.test_client()
+    for path in ["/api/boats/1", "/api/boats/view"]:
+        etag = client.get(path).headers["ETag"]
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED.value
+
+
+def test_not_modified_after_write_on_other_app(
+    shared_app: Flask, tmp_path: Path
+) -> None:
+    """
+    Test case for two workers sharing the cache: a write on one of them
+    changes the etag of the other and drops its cached entries
+    """
+    other_app = use_shared_cache(
+        LazyImporter("app").get_module().create_app(), tmp_path / "cache"
+    )
+    client = shared_app.test_client()
+    other_client = other_app.test_client()
+    response = other_client.get("/api/boats/5")
+    etag = response.headers["ETag"]
+    base_cost = json.loads(cast(bytes, response.data))["base_cost"]
+    client.patch("/api/boats/5", json={"base_cost": 4242})
+    try:
+        response = other_client.get("/api/boats/5", headers={"If-None-Match": etag})
+        assert response.status_code == HTTPStatus.OK.value
+        assert response.headers["ETag"] != etag
+        assert json.loads(cast(bytes, response.data))["base_cost"] == 4242
+    finally:
+        client.patch("/api/boats/5", json={"base_cost": base_cost})
+
+
+def test_get_all_stream(app: Flask) -> None:
+    """Test case for get all streamed as a json array"""
+    client = app.test_client()
+    response = client.get("/api/boats?stream=1")
+    assert response.status_code == HTTPStatus.OK.value
+    assert response.is_streamed
+    assert response.mimetype == "application/json"
+    json_response = client.get("/api/boats")
+    assert json.loads(response.data) == json.loads(cast(bytes, json_response.data))
+
+
+def test_no_etag_without_shared_cache(app: Flask) -> None:
+    """Test case for a cache of each worker, it does not see other writes"""
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    app_cache.init_app(app)
+    response = app.test_client().get("/api/boats/1")
+    assert response.status_code == HTTPStatus.OK.value
+    assert "ETag" not in response.headers
+
+
+def test_get_all_stream_ndjson(shared_app: Flask) -> None:
+    """Test case for get all using filter streamed as json lines"""
+    client = shared_app.test_client()
+    headers = {"Accept": "application/x-ndjson"}
+    response = client.get("/api/boats?boat_id=16&fields=name", headers=headers)
+    assert response.status_code == HTTPStatus.OK.value
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.data.decode(helper.UTF_8).splitlines()
+    assert [json.loads(line)["boat_id"] for line in lines] == [16]
+    json_response = client.get("/api/boats?boat_id=16&fields=name")
+    assert response.headers["ETag"] != json_response.headers["ETag"]
+
+
+def test_get_all_stream_wrong_filter(app: Flask) -> None:
+    """Test case for get all streamed using bad filter"""
+    client = app.test_client()
+    response = client.get("/api/boats?stream=1&non-valid-field=Test")
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+
+
 def test_get_all_filter(app: Flask) -> None:
     """Test case for get all using filter"""
     client = app.test_client()
@@ -36,6 +282,65 @@ def test_get_all_wrong_filter(app: Flask) -> None:
     helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
 
 
+def test_get_all_operator_filter(app: Flask) -> None:
+    """Test case for get all using typed filter operators"""
+    client = app.test_client()
+    response = client.get("/api/boats?base_cost__lte=800&boat_id__in=2,3,9")
+    assert response.status_code == HTTPStatus.OK.value
+    data = json.loads(cast(bytes, response.data))
+    assert sorted(item["boat_id"] for item in data) == [2, 3]
+    response = client.get("/api/boats?build_limit=true&fields=name")
+    data = json.loads(cast(bytes, response.data))
+    assert [item["boat_id"] for item in data] == [3]
+    response = client.get("/api/boats?name__prefix=Boat 1&limit=20")
+    data = json.loads(cast(bytes, response.data))
+    assert all(item["name"].startswith("Boat 1") for item in data["items"])
+    response = client.get("/api/boats?name__prefix=%25")
+    helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
+
+
+def test_get_all_wrong_operator_filter(app: Flask) -> None:
+    """Test case for get all using a bad operator or value"""
+    client = app.test_client()
+    response = client.get("/api/boats?build_limit__lt=1")
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    response = client.get("/api/boats?boat_id__in=1,two")
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+
+
+def test_get_all_filter_cached(app: Flask, monkeypatch: MonkeyPatch) -> None:
+    """Test case for get all using filter served from cache in any arg order"""
+    client = app.test_client()
+    response = client.get("/api/boats?base_cost__lte=800&boat_id__in=3,2")
+    monkeypatch.setattr(crud, "get_by_query_args", Mock(side_effect=RuntimeError))
+    cached_response = client.get("/api/boats?boat_id__in=2,3&base_cost__lte=800")
+    assert cached_response.status_code == HTTPStatus.OK.value
+    assert cached_response.data == response.data
+
+
+def test_get_all_filter_invalidated(app: Flask) -> None:
+    """Test case for a cached filter after one of its items is patched"""
+    client = app.test_client()
+    response = client.get("/api/boats?boat_id=1")
+    name = json.loads(cast(bytes, response.data))[0]["name"]
+    client.patch("/api/boats/1", json={"name": f"{name} Test"})
+    response = client.get("/api/boats?boat_id=1")
+    assert json.loads(cast(bytes, response.data))[0]["name"] == f"{name} Test"
+    client.patch("/api/boats/1", json={"name": name})
+
+
+def test_get_all_filter_bounded(app: Flask) -> None:
+    """Test case for filters over max_filters, they are not cached"""
+    app.config["CACHE_POLICIES"] = {"boats": {"max_filters": 0}}
+    client = app.test_client()
+    for _ in range(2):
+        response = client.get("/api/boats?base_cost__gte=2400")
+        data = json.loads(cast(bytes, response.data))
+        assert [item["boat_id"] for item in data] == [19, 20]
+    stats = CacheService().get_cache_stats()["namespaces"]["boats"]
+    assert stats["rejections"] >= 2
+
+
 def test_get_all_not_found(app: Flask) -> None:
     """Test case for get all not found scenario"""
     client = app.test_client()
@@ -50,6 +355,27 @@ def test_get_by_id_not_found(app: Flask) -> None:
     helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
 
 
+def test_get_by_id_not_int(app: Flask) -> None:
+    """Test case for get by id using an id that is not an integer"""
+    client = app.test_client()
+    response = client.get("/api/boats/abc")
+    helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
+    data = json.loads(cast(bytes, response.data))
+    assert data["path"] == "/api/boats/abc"
+
+
+def test_get_by_id_padded(app: Flask) -> None:
+    """Test case for a padded id, its entry is invalidated with the row"""
+    client = app.test_client()
+    boat = json.loads(cast(bytes, client.get("/api/boats/01").data))
+    client.patch("/api/boats/1", json={"base_cost": boat["base_cost"] + 1})
+    try:
+        data = json.loads(cast(bytes, client.get("/api/boats/01").data))
+        assert data["base_cost"] == boat["base_cost"] + 1
+    finally:
+        client.patch("/api/boats/1", json={"base_cost": boat["base_cost"]})
+
+
 def test_get_by_id(app: Flask) -> None:
     """Test case for get by id"""
     client = app.test_client()
@@ -62,6 +388,17 @@ def test_get_by_id(app: Flask) -> None:
     assert isinstance(data["base_cost"], int)
 
 
+def test_get_by_id_fields(app: Flask) -> None:
+    """Test case for get by id returning only some fields"""
+    client = app.test_client()
+    response = client.get("/api/boats/1?fields=name")
+    assert response.status_code == HTTPStatus.OK.value
+    data = json.loads(cast(bytes, response.data))
+    assert data == {"boat_id": 1, "name": data["name"]}
+    response = client.get("/api/boats/9999?fields=name")
+    helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
+
+
 def test_create_not_valid(app: Flask) -> None:
     """Test case for create empty payload"""
     client = app.test_client()
@@ -80,6 +417,203 @@ def test_create_missing_data(app: Flask) -> None:
     assert data["path"] is not None
 
 
+def test_create_all(shared_app: Flask) -> None:
+    """Test case for create several items in one request"""
+    client = shared_app.test_client()
+    etag = client.get("/api/boats").headers["ETag"]
+    payload = [
+        {"boat_id": 90001, "name": "Bulk Boat 1", "base_cost": 100},
+        {"boat_id": 90002, "name": "Bulk Boat 2", "base_cost": 200},
+    ]
+    response = client.post("/api/boats", json=payload)
+    assert response.status_code == HTTPStatus.CREATED.value
+    data = json.loads(cast(bytes, response.data))
+    assert [item["name"] for item in data] == ["Bulk Boat 1", "Bulk Boat 2"]
+    all_response = client.get("/api/boats")
+    names = [item["name"] for item in json.loads(cast(bytes, all_response.data))]
+    assert "Bulk Boat 2" in names
+    assert client.get("/api/boats").headers["ETag"] != etag
+    client.delete("/api/boats", json=[item["boat_id"] for item in payload])
+
+
+def test_create_all_mixed_ids(app: Flask) -> None:
+    """Test case for create several items, only some of them with a null id"""
+    client = app.test_client()
+    payload = [
+        {"boat_id": None, "name": "Bulk Boat 1", "base_cost": 100},
+        {"boat_id": 90002, "name": "Bulk Boat 2", "base_cost": 200},
+        {"boat_id": None, "name": "Bulk Boat 3", "base_cost": 300},
+    ]
+    response = client.post("/api/boats", json=payload)
+    assert response.status_code == HTTPStatus.CREATED.value
+    data = json.loads(cast(bytes, response.data))
+    try:
+        assert [item["name"] for item in data] == [
+            "Bulk Boat 1",
+            "Bulk Boat 2",
+            "Bulk Boat 3",
+        ]
+        assert data[1]["boat_id"] == 90002
+        assert all(item["boat_id"] is not None for item in data)
+    finally:
+        client.delete("/api/boats", json=[item["boat_id"] for item in data])
+
+
+def test_create_all_cached_miss(app: Flask) -> None:
+    """Test case for create several items whose ids were cached as missing"""
+    client = app.test_client()
+    response = client.get("/api/boats/90002")
+    helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
+    payload = [
+        {"boat_id": 90001, "name": "Bulk Boat 1", "base_cost": 100},
+        {"boat_id": 90002, "name": "Bulk Boat 2", "base_cost": 200},
+    ]
+    client.post("/api/boats", json=payload)
+    try:
+        assert client.get("/api/boats/90002").status_code == HTTPStatus.OK.value
+    finally:
+        client.delete("/api/boats", json=[90001, 90002])
+
+
+def test_create_and_patch_without_returning(
+    app: Flask, monkeypatch: MonkeyPatch
+) -> None:
+    """Test case for writes refreshed after commit, if db has no RETURNING"""
+    monkeypatch.setattr(database, "_supports_returning", Mock(return_value=False))
+    client = app.test_client()
+    payload = {"boat_id": 90001, "name": "Refreshed Boat", "base_cost": 100}
+    response = client.post("/api/boats", json=payload)
+    assert response.status_code == HTTPStatus.CREATED.value
+    assert json.loads(cast(bytes, response.data))["created_at"] is not None
+    response = client.patch("/api/boats/90001", json={"base_cost": 150})
+    data = json.loads(cast(bytes, response.data))
+    assert data["base_cost"] == 150
+    assert data["updated_at"] is not None
+    client.delete("/api/boats/90001")
+
+
+def test_create_all_without_returning(app: Flask, monkeypatch: MonkeyPatch) -> None:
+    """Test case for create several items refreshed after commit, no RETURNING"""
+    monkeypatch.setattr(database, "_supports_returning", Mock(return_value=False))
+    client = app.test_client()
+    payload = [
+        {"boat_id": 90002, "name": "Bulk Boat 2", "base_cost": 200},
+        {"boat_id": 90001, "name": "Bulk Boat 1", "base_cost": 100},
+    ]
+    response = client.post("/api/boats", json=payload)
+    try:
+        assert response.status_code == HTTPStatus.CREATED.value
+        data = json.loads(cast(bytes, response.data))
+        assert [item["boat_id"] for item in data] == [90002, 90001]
+        assert all(item["created_at"] is not None for item in data)
+    finally:
+        client.delete("/api/boats", json=[90001, 90002])
+
+
+def test_create_all_not_valid(app: Flask) -> None:
+    """Test case for create several items when one of them is not valid"""
+    client = app.test_client()
+    payload = [
+        {"boat_id": 90001, "name": "Bulk Boat 1", "base_cost": 100},
+        {"boat_id": 90002, "base_cost": -1},
+    ]
+    response = client.post("/api/boats", json=payload)
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    data = json.loads(cast(bytes, response.data))
+    assert {error["loc"][0] for error in data["message"]} == {1}
+    assert client.get("/api/boats/90001").status_code == HTTPStatus.NOT_FOUND.value
+
+
+def test_create_all_empty(app: Flask) -> None:
+    """Test case for create several items with an empty array"""
+    client = app.test_client()
+    response = client.post("/api/boats", json=[])
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    data = json.loads(cast(bytes, response.data))
+    assert data["message"] == "From 1 to 1000 items can be created"
+
+
+def test_patch_all(app: Flask) -> None:
+    """Test case for patch several items in one request"""
+    client = app.test_client()
+    responses = [client.get(f"/api/boats/{boat_id}") for boat_id in [1, 2]]
+    boats = [json.loads(cast(bytes, response.data)) for response in responses]
+    client.get("/api/boats")
+    payload = [
+        {"id": boat["boat_id"], "changes": {"base_cost": boat["base_cost"] + 1}}
+        for boat in boats
+    ]
+    response = client.patch("/api/boats", json=payload)
+    assert response.status_code == HTTPStatus.OK.value
+    data = json.loads(cast(bytes, response.data))
+    assert [item["base_cost"] for item in data] == [
+        boat["base_cost"] + 1 for boat in boats
+    ]
+    response = client.get("/api/boats/2")
+    data = json.loads(cast(bytes, response.data))
+    assert data["base_cost"] == boats[1]["base_cost"] + 1
+    restore = [
+        {"id": boat["boat_id"], "changes": {"base_cost": boat["base_cost"]}}
+        for boat in boats
+    ]
+    client.patch("/api/boats", json=restore)
+
+
+def test_patch_all_not_valid(app: Flask) -> None:
+    """Test case for patch several items using non valid changes"""
+    client = app.test_client()
+    response = client.patch(
+        "/api/boats", json=[{"id": 1, "changes": {"created_at": "2023-11-03"}}]
+    )
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    response = client.patch("/api/boats", json=[{"id": 1, "changes": {"boat_id": 7}}])
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    response = client.patch(
+        "/api/boats", json=[{"id": 1, "changes": {"model_config": {}}}]
+    )
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    response = client.patch("/api/boats", json=[{"id": 1}])
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+
+
+def test_patch_all_not_found(app: Flask) -> None:
+    """Test case for patch several items when one of them is missing"""
+    client = app.test_client()
+    response = client.patch(
+        "/api/boats",
+        json=[{"id": 1, "changes": {}}, {"id": 9999, "changes": {"base_cost": 1}}],
+    )
+    helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
+
+
+def test_delete_all(app: Flask) -> None:
+    """Test case for delete several items in one request"""
+    client = app.test_client()
+    payload = [
+        {"boat_id": 90001, "name": "Bulk Boat 1", "base_cost": 100},
+        {"boat_id": 90002, "name": "Bulk Boat 2", "base_cost": 200},
+    ]
+    client.post("/api/boats", json=payload)
+    response = client.delete("/api/boats", json=[90001, 90002])
+    assert response.status_code == HTTPStatus.NO_CONTENT.value
+    response = client.get("/api/boats/90002")
+    helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
+
+
+def test_delete_all_not_valid(app: Flask) -> None:
+    """Test case for delete several items using repeated, missing or not int ids"""
+    client = app.test_client()
+    response = client.delete("/api/boats", json=[1, 1])
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    response = client.delete("/api/boats", json=[True])
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    response = client.delete("/api/boats", json=["abc"])
+    helper.assert_api_error(response, HTTPStatus.BAD_REQUEST.value)
+    assert client.get("/api/boats/1").status_code == HTTPStatus.OK.value
+    response = client.delete("/api/boats", json=[9999])
+    helper.assert_api_error(response, HTTPStatus.NOT_FOUND.value)
+
+
 def test_patch_item_not_valid(app: Flask) -> None:
     """Test case for patch empty payload"""
     client = app.test_client()
@@ -17,3 +17,31 @@ def test_health_check(app: Flask) -> None:
     data_bytes: bytes = cast(bytes, response.data)
     data = json.loads(data_bytes.decode(helper.UTF_8))
     assert data == {"status": "UP"}
+
+
+def test_write_stats(app: Flask) -> None:
+    """Test case for the round trips of a patch read back with RETURNING"""
+    client = app.test_client()
+    name = json.loads(cast(bytes, client.get("/api/boats/1").data))["name"]
+    client.patch("/api/boats/1", json={"name": f"{name} Test"})
+    response = client.get("/health/writes")
+    before = json.loads(cast(bytes, response.data))["boat"]["patch"]
+    client.patch("/api/boats/1", json={"name": name})
+    response = client.get("/health/writes")
+    assert response.status_code == HTTPStatus.OK.value
+    after = json.loads(cast(bytes, response.data))["boat"]["patch"]
+    assert after["writes"] == before["writes"] + 1
+    assert after["round_trips"] == before["round_trips"] + 1
+
+
+def test_pool_stats(app: Flask) -> None:
+    """Test case for the checkouts of the primary pool"""
+    client = app.test_client()
+    before = json.loads(cast(bytes, client.get("/health/pools").data))["primary"]
+    # streamed lists are not cached, they always read the db
+    client.get("/api/boats?stream=1").get_data()
+    response = client.get("/health/pools")
+    assert response.status_code == HTTPStatus.OK.value
+    after = json.loads(cast(bytes, response.data))["primary"]
+    assert after["checkouts"] > before["checkouts"]
+    assert after["size"] == 5
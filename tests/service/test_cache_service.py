@@ -1,15 +1,37 @@
 """Test Service layer for cache service"""
 
+import tempfile
+import threading
+import time
 from unittest import TestCase
 from unittest.mock import Mock, patch
 from typing import Any
 
-from app.service.cache_service import CacheService
+from flask import Response
+from flask_caching.backends.simplecache import SimpleCache
+
+from app.configs.cache_cfg import CacheConfig
+from app.core.cache_backends import (
+    AtomicFileSystemCache,
+    InvalidationChannel,
+    LruCache,
+    TieredCache,
+)
+from app.service.cache_service import (
+    CacheEntry,
+    CachePolicy,
+    CacheService,
+    NEGATIVE_ENTRY,
+    check_cache_policies,
+    get_cache_policy,
+)
 
 
 class TestCacheService(TestCase):
     """Test cases for cache service class"""
 
+    _boats: str
+
     @classmethod
     def setUpClass(cls) -> None:
         """Set up main data."""
@@ -37,12 +59,159 @@ class TestCacheService(TestCase):
         keys = self.cache_service.get_cache_keys()
         self.assertEqual([self._boats, f"{self._boats}-1"], keys)
 
-    @patch("app.service.cache_service.CacheService.get_cache_keys")
-    def test_clear_cache_by_name(self, mock_get_cache_keys: Mock) -> None:
+    def test_get_generation_is_present(self) -> None:
+        """Test case for get_generation when counter exists"""
+        self._cache_mock.get_many.return_value = [17]
+        self.assertEqual(17, self.cache_service.get_generation(self._boats))
+        self._cache_mock.get_many.assert_called_once_with(f"{self._boats}:gen")
+        self._cache_mock.add.assert_not_called()
+
+    def test_get_generation_is_empty(self) -> None:
+        """Test case for get_generation when counter must be seeded"""
+        self._cache_mock.get_many.return_value = [None]
+        self._cache_mock.get.return_value = 42
+        self.assertEqual(42, self.cache_service.get_generation(self._boats))
+        self._cache_mock.add.assert_called_once()
+
+    @patch("app.service.cache_service.CacheService.get_generations")
+    def test_get_cache_key(self, mock_get_generations: Mock) -> None:
+        """Test case for get_cache_key"""
+        mock_get_generations.return_value = [17]
+        self.assertEqual("boats:g17", self.cache_service.get_cache_key(self._boats))
+        self.assertEqual(
+            "boats:g17:7", self.cache_service.get_cache_key(self._boats, 7)
+        )
+
+    @patch("app.service.cache_service.CacheService.get_generations")
+    def test_get_cache_key_tags(self, mock_get_generations: Mock) -> None:
+        """Test case for get_cache_key when entry depends on other tags"""
+        mock_get_generations.return_value = [3, 17, 5]
+        result = self.cache_service.get_cache_key(
+            "boats-money", 1, tags=[self._boats, "boatxfactions-faction_id-1"]
+        )
+        self.assertEqual(
+            "boats-money:g3:boats.g17:boatxfactions-faction_id-1.g5:1", result
+        )
+        mock_get_generations.assert_called_once_with(
+            "boats-money", self._boats, "boatxfactions-faction_id-1"
+        )
+
+    @patch("app.service.cache_service.CacheService.get_generations")
+    def test_clear_cache_by_name(self, mock_get_generations: Mock) -> None:
         """Test case for clear_cache_by_name"""
-        mock_get_cache_keys.return_value = [self._boats, f"{self._boats}-1"]
         self.cache_service.clear_cache_by_name(self._boats)
-        self.assertEqual(2, self._cache_mock.delete.call_count)
+        self._cache_mock.cache.inc.assert_called_once_with(f"{self._boats}:gen")
+        self._cache_mock.delete.assert_not_called()
+
+    @patch("app.service.cache_service.CacheService.get_generations")
+    def test_invalidate_tags(self, mock_get_generations: Mock) -> None:
+        """Test case for invalidate_tags with repeated tags"""
+        self.cache_service.invalidate_tags(self._boats, "boats-7", self._boats)
+        mock_get_generations.assert_called_once_with(self._boats, "boats-7")
+        self.assertEqual(2, self._cache_mock.cache.inc.call_count)
+
+    @patch("app.service.cache_service.CacheService.get_generations")
+    def test_invalidate_tags_keeps_generation(self, mock_get_generations: Mock) -> None:
+        """Test case for a generation that outlives the default timeout"""
+        backend = SimpleCache(default_timeout=3600)  # type: ignore[no-untyped-call]
+        backend.add(f"{self._boats}:gen", 17, timeout=0)
+        self._cache_mock.cache = backend
+        self.cache_service.invalidate_tags(self._boats)
+        with patch("cachelib.simple.time", return_value=time.time() + 7200):
+            self.assertEqual(18, backend.get(f"{self._boats}:gen"))
+
+    @patch("app.service.cache_service.CacheService.get_generations")
+    def test_invalidate_tags_one_message(self, mock_get_generations: Mock) -> None:
+        """Test case for the tags of a bulk write of more than 1000 items"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            l2 = AtomicFileSystemCache(  # type: ignore[no-untyped-call]
+                cache_dir, threshold=0
+            )
+            # channel of other worker, it reads the messages since it was created
+            channel = InvalidationChannel(l2)
+            self._cache_mock.cache = TieredCache(
+                LruCache(), l2, InvalidationChannel(l2)
+            )
+            tags = [f"{self._boats}-{index}" for index in range(1, 1201)]
+            self.cache_service.invalidate_tags(self._boats, *tags)
+            keys = channel.poll()
+        mock_get_generations.assert_called_once()
+        self.assertEqual(1201, len(keys or []))
+
+    def test_admit_key_cached(self) -> None:
+        """Test case for admit_key when the entry is already cached"""
+        self._cache_mock.has.return_value = True
+        self.assertTrue(
+            self.cache_service.admit_key("boats:g1:filter:a", "boats:g1", 0)
+        )
+        self._cache_mock.cache.inc.assert_not_called()
+
+    @patch("app.service.cache_service.app_cache_stats")
+    def test_admit_key_bounded(self, mock_stats: Mock) -> None:
+        """Test case for admit_key counting the new entries of a namespace"""
+        self._cache_mock.has.return_value = False
+        self._cache_mock.cache.inc.side_effect = [1, 2]
+        self.assertTrue(
+            self.cache_service.admit_key("boats:g1:filter:a", "boats:g1", 1)
+        )
+        self.assertFalse(
+            self.cache_service.admit_key("boats:g1:filter:b", "boats:g1", 1)
+        )
+        self._cache_mock.cache.inc.assert_called_with("boats:g1:filters")
+        self._cache_mock.delete.assert_called_once_with("boats:g1:filter:b:admitted")
+        mock_stats.incr.assert_called_once_with(self._boats, "rejections")
+
+    def test_admit_key_admitted_before(self) -> None:
+        """Test case for admit_key when the entry of an admitted key expired"""
+        self._cache_mock.has.return_value = False
+        self._cache_mock.add.return_value = False
+        self.assertTrue(
+            self.cache_service.admit_key("boats:g1:filter:a", "boats:g1", 1)
+        )
+        self._cache_mock.add.assert_called_once_with(
+            "boats:g1:filter:a:admitted", 1, timeout=0
+        )
+        self._cache_mock.cache.inc.assert_not_called()
+
+    @patch("app.service.cache_service.app_cache_stats")
+    def test_admit_key_counts_distinct_keys(self, mock_stats: Mock) -> None:
+        """Test case for keys admitted again after their entries expired"""
+        backend = SimpleCache()  # type: ignore[no-untyped-call]
+        self._cache_mock.cache = backend
+        self._cache_mock.has.side_effect = backend.has
+        self._cache_mock.add.side_effect = backend.add
+        self._cache_mock.delete.side_effect = backend.delete
+        for _ in range(3):
+            self.assertTrue(
+                self.cache_service.admit_key("boats:g1:filter:a", "boats:g1", 1)
+            )
+        self.assertFalse(
+            self.cache_service.admit_key("boats:g1:filter:b", "boats:g1", 1)
+        )
+        self.assertFalse(backend.has("boats:g1:filter:b:admitted"))
+        mock_stats.incr.assert_called_once_with(self._boats, "rejections")
+
+    @patch("app.service.cache_service.app_cache_stats")
+    def test_get_cache_stats(self, mock_stats: Mock) -> None:
+        """Test case for get_cache_stats"""
+        self._cache_mock.cache._cache = {
+            "boats:g1": (0, b"12345"),
+            "boats-7:g1": (0, b"123"),
+            "tanks:g1": (0, b"1"),
+        }
+        self._cache_mock.cache.evictions = 2
+        mock_stats.get_counters.return_value = {
+            self._boats: {"hits": 3, "misses": 2, "loads": 2, "load_time": 0.5}
+        }
+        stats = self.cache_service.get_cache_stats()
+        self.assertEqual(3, stats["entries"])
+        self.assertEqual(9, stats["bytes"])
+        self.assertEqual(2, stats["evictions"])
+        self.assertEqual(3, stats["namespaces"][self._boats]["hits"])
+        self.assertEqual(250, stats["namespaces"][self._boats]["load_time_avg_ms"])
+        self.assertEqual(2, stats["namespaces"][self._boats]["entries"])
+        self.assertEqual(8, stats["namespaces"][self._boats]["bytes"])
+        self.assertEqual(1, stats["namespaces"]["tanks"]["entries"])
 
     def test_clear_cache(self) -> None:
         """Test case for clear_cache"""
@@ -71,5 +240,288 @@ class TestCacheService(TestCase):
             self._boats, TestCacheService.mock_fun, faction_id=1
         )
         self.assertEqual([{"boat_id": 1}], result)
-        self._cache_mock.get.assert_called_once_with(self._boats)
+        self._cache_mock.get.assert_called_with(self._boats)
+        self._cache_mock.set.assert_called_once()
+
+    def test_fetch_from_cache_or_else_negative_hit(self) -> None:
+        """Test case for fetch_from_cache_or_else when a miss was cached"""
+        self._cache_mock.get.return_value = NEGATIVE_ENTRY
+        fun = Mock()
+        result = self.cache_service.fetch_from_cache_or_else(self._boats, fun)
+        self.assertIsNone(result)
+        fun.assert_not_called()
+
+    def test_fetch_from_cache_or_else_empty_hit(self) -> None:
+        """Test case for fetch_from_cache_or_else when an empty list was cached"""
+        self._cache_mock.get.return_value = []
+        fun = Mock()
+        result = self.cache_service.fetch_from_cache_or_else(self._boats, fun)
+        self.assertEqual([], result)
+        fun.assert_not_called()
+
+    @patch("app.service.cache_service.get_cache_setting")
+    def test_fetch_from_cache_or_else_set_negative(self, mock_setting: Mock) -> None:
+        """Test case for fetch_from_cache_or_else when fun finds nothing"""
+        mock_setting.side_effect = {
+            "CACHE_POLICIES": {},
+            "CACHE_DEFAULT_TIMEOUT": 3600,
+            "CACHE_NEGATIVE_TIMEOUT": 60,
+        }.get
+        self._cache_mock.get.return_value = None
+        result = self.cache_service.fetch_from_cache_or_else(self._boats, lambda: None)
+        self.assertIsNone(result)
+        self._cache_mock.set.assert_called_once_with(
+            self._boats, NEGATIVE_ENTRY, timeout=60
+        )
+
+    @patch("app.service.cache_service.get_cache_setting")
+    def test_fetch_from_cache_or_else_set_soft_timeout(
+        self, mock_setting: Mock
+    ) -> None:
+        """Test case for fetch_from_cache_or_else storing the soft timeout"""
+        mock_setting.side_effect = {"CACHE_POLICIES": {}, "CACHE_SOFT_TIMEOUT": 60}.get
+        self._cache_mock.get.return_value = None
+        result = self.cache_service.fetch_from_cache_or_else(
+            self._boats, TestCacheService.mock_fun, faction_id=1
+        )
+        self.assertEqual([{"boat_id": 1}], result)
+        entry = self._cache_mock.set.call_args.args[1]
+        self.assertIsInstance(entry, CacheEntry)
+        self.assertEqual([{"boat_id": 1}], entry.value)
+
+    def test_fetch_from_cache_or_else_fresh_entry(self) -> None:
+        """Test case for fetch_from_cache_or_else before the soft timeout"""
+        self._cache_mock.get.return_value = CacheEntry([{"boat_id": 1}], 1e12)
+        fun = Mock()
+        result = self.cache_service.fetch_from_cache_or_else(self._boats, fun)
+        self.assertEqual([{"boat_id": 1}], result)
+        fun.assert_not_called()
+
+    def test_fetch_from_cache_or_else_stale_entry(self) -> None:
+        """Test case for fetch_from_cache_or_else refreshing a stale entry"""
+        self._cache_mock.get.return_value = CacheEntry([{"boat_id": 1}], 0)
+        refreshed = threading.Event()
+        release = threading.Event()
+        fun = Mock()
+
+        def slow_fun(faction_id: int) -> list[dict[str, Any]]:
+            release.wait(5)
+            fun(faction_id)
+            refreshed.set()
+            return [{"boat_id": 2}]
+
+        results = [
+            self.cache_service.fetch_from_cache_or_else(
+                self._boats, slow_fun, faction_id=1
+            )
+            for _ in range(3)
+        ]
+        release.set()
+        self.assertTrue(refreshed.wait(5))
+        self.assertEqual([[{"boat_id": 1}]] * 3, results)
+        fun.assert_called_once_with(1)
+
+    def test_fetch_from_cache_or_else_stale_refresh_fails(self) -> None:
+        """Test case for fetch_from_cache_or_else when the refresh raises"""
+        self._cache_mock.get.return_value = CacheEntry([{"boat_id": 1}], 0)
+        failed = threading.Event()
+
+        def failing_fun() -> None:
+            failed.set()
+            raise RuntimeError("db is down")
+
+        result = self.cache_service.fetch_from_cache_or_else(self._boats, failing_fun)
+        self.assertEqual([{"boat_id": 1}], result)
+        self.assertTrue(failed.wait(5))
+        self._cache_mock.set.assert_not_called()
+
+    @patch("app.service.cache_service.get_cache_setting")
+    def test_fetch_from_cache_or_else_stale_refresh_fails_distributed(
+        self, mock_setting: Mock
+    ) -> None:
+        """Test case for a failed refresh in distributed mode, it drops the lock"""
+        mock_setting.side_effect = {
+            "CACHE_LOCK_MODE": "distributed",
+            "CACHE_LOCK_TIMEOUT": 10,
+            "CACHE_DEFAULT_TIMEOUT": 3600,
+            "CACHE_NEGATIVE_TIMEOUT": 60,
+            "CACHE_MAX_FILTERS": 100,
+            "CACHE_POLICIES": {},
+            "CACHE_SOFT_TIMEOUT": 0,
+        }.get
+        self._cache_mock.get.return_value = CacheEntry([{"boat_id": 1}], 0)
+        self._cache_mock.add.return_value = True
+        unlocked = threading.Event()
+        self._cache_mock.delete.side_effect = lambda key: unlocked.set()
+
+        def failing_fun() -> None:
+            raise RuntimeError("db is down")
+
+        result = self.cache_service.fetch_from_cache_or_else(self._boats, failing_fun)
+        self.assertEqual([{"boat_id": 1}], result)
+        self.assertTrue(unlocked.wait(5))
+        self._cache_mock.delete.assert_called_once_with(f"{self._boats}:lock")
+
+    def test_check_cache_policies(self) -> None:
+        """Test case for check_cache_policies with the default policies"""
+        check_cache_policies(CacheConfig.CACHE_POLICIES)
+        check_cache_policies({"boats": {"serializer": "pickle", "enabled": False}})
+
+    def test_check_cache_policies_not_valid(self) -> None:
+        """Test case for check_cache_policies with unknown or wrong fields"""
+        for policy in [
+            {"ttl": 10},
+            {"timeout": "10"},
+            {"timeout": True},
+            {"timeout": -1},
+            {"enabled": 1},
+            {"serializer": "yaml"},
+        ]:
+            with self.subTest(policy=policy), self.assertRaises(ValueError):
+                check_cache_policies({self._boats: policy})
+        with self.assertRaises(ValueError):
+            check_cache_policies({self._boats: 300})
+
+    @patch("app.service.cache_service.get_cache_setting")
+    def test_get_cache_policy(self, mock_setting: Mock) -> None:
+        """Test case for get_cache_policy with exact, pattern and default"""
+        mock_setting.side_effect = {
+            "CACHE_POLICIES": {
+                "*xfactions": {"timeout": 300},
+                "boatxfactions": {"enabled": False},
+            },
+            "CACHE_DEFAULT_TIMEOUT": 3600,
+            "CACHE_NEGATIVE_TIMEOUT": 60,
+            "CACHE_MAX_FILTERS": 100,
+        }.get
+        self.assertEqual(
+            CachePolicy(3600, 60, enabled=False), get_cache_policy("boatxfactions")
+        )
+        self.assertEqual(CachePolicy(300, 60), get_cache_policy("tankxfactions"))
+        self.assertEqual(CachePolicy(3600, 60), get_cache_policy(self._boats))
+
+    def test_fetch_from_cache_or_else_disabled(self) -> None:
+        """Test case for fetch_from_cache_or_else when namespace is not cached"""
+        result = self.cache_service.fetch_from_cache_or_else(
+            self._boats,
+            TestCacheService.mock_fun,
+            policy=CachePolicy(3600, 60, enabled=False),
+            faction_id=1,
+        )
+        self.assertEqual([{"boat_id": 1}], result)
+        self._cache_mock.get.assert_not_called()
+        self._cache_mock.set.assert_not_called()
+
+    def test_fetch_from_cache_or_else_policy_timeout(self) -> None:
+        """Test case for fetch_from_cache_or_else using the policy timeout"""
+        self._cache_mock.get.return_value = None
+        self.cache_service.fetch_from_cache_or_else(
+            self._boats,
+            TestCacheService.mock_fun,
+            policy=CachePolicy(86400, 60),
+            faction_id=1,
+        )
+        self._cache_mock.set.assert_called_once_with(
+            self._boats, [{"boat_id": 1}], timeout=86400
+        )
+
+    def test_fetch_response_from_cache_or_else_is_present(self) -> None:
+        """Test case for fetch_response_from_cache_or_else when present in cache"""
+        self._cache_mock.get.return_value = (b'[{"boat_id": 1}]', "application/json")
+        fun = Mock()
+        response = self.cache_service.fetch_response_from_cache_or_else(
+            self._boats, fun
+        )
+        assert response is not None
+        self.assertEqual(b'[{"boat_id": 1}]', response.get_data())
+        self.assertEqual("application/json", response.mimetype)
+        fun.assert_not_called()
+
+    def test_fetch_response_from_cache_or_else_is_empty(self) -> None:
+        """Test case for fetch_response_from_cache_or_else when not in cache"""
+        self._cache_mock.get.return_value = None
+        response = self.cache_service.fetch_response_from_cache_or_else(
+            self._boats, lambda: Response(b"[]", mimetype="application/json")
+        )
+        assert response is not None
+        self.assertEqual(b"[]", response.get_data())
+        self._cache_mock.set.assert_called_once_with(
+            self._boats, (b"[]", "application/json"), timeout=3600
+        )
+
+    def test_fetch_from_cache_or_else_single_flight(self) -> None:
+        """Test case for fetch_from_cache_or_else with concurrent callers"""
+        stored: dict[str, Any] = {}
+        self._cache_mock.get.side_effect = stored.get
+        self._cache_mock.set.side_effect = lambda key, value, **_: stored.update(
+            {key: value}
+        )
+        started = threading.Event()
+        release = threading.Event()
+        fun = Mock()
+
+        def slow_fun(faction_id: int) -> list[dict[str, Any]]:
+            started.set()
+            release.wait(5)
+            fun(faction_id)
+            return TestCacheService.mock_fun(faction_id)
+
+        results: list[Any] = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    self.cache_service.fetch_from_cache_or_else(
+                        self._boats, slow_fun, faction_id=1
+                    )
+                )
+            )
+            for _ in range(4)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual([[{"boat_id": 1}]] * 4, results)
+        fun.assert_called_once_with(1)
         self._cache_mock.set.assert_called_once()
+
+    @patch("app.service.cache_service.get_cache_setting")
+    def test_fetch_from_cache_or_else_distributed_leader(
+        self, mock_setting: Mock
+    ) -> None:
+        """Test case for fetch_from_cache_or_else holding the worker lock"""
+        mock_setting.side_effect = {
+            "CACHE_POLICIES": {},
+            "CACHE_LOCK_MODE": "distributed",
+            "CACHE_LOCK_TIMEOUT": 1,
+        }.get
+        self._cache_mock.get.return_value = None
+        self._cache_mock.add.return_value = True
+        result = self.cache_service.fetch_from_cache_or_else(
+            self._boats, TestCacheService.mock_fun, faction_id=1
+        )
+        self.assertEqual([{"boat_id": 1}], result)
+        self._cache_mock.add.assert_called_once()
+        self._cache_mock.delete.assert_called_once_with(f"{self._boats}:lock")
+
+    @patch("app.service.cache_service.get_cache_setting")
+    def test_fetch_from_cache_or_else_distributed_follower(
+        self, mock_setting: Mock
+    ) -> None:
+        """Test case for fetch_from_cache_or_else when other worker loads"""
+        mock_setting.side_effect = {
+            "CACHE_POLICIES": {},
+            "CACHE_LOCK_MODE": "distributed",
+            "CACHE_LOCK_TIMEOUT": 1,
+            "CACHE_LOCK_POLL_INTERVAL": 0,
+        }.get
+        self._cache_mock.get.side_effect = [None, None, [{"boat_id": 2}]]
+        self._cache_mock.add.return_value = False
+        fun = Mock()
+        result = self.cache_service.fetch_from_cache_or_else(self._boats, fun)
+        self.assertEqual([{"boat_id": 2}], result)
+        fun.assert_not_called()
+        self._cache_mock.set.assert_not_called()
@@ -0,0 +1,37 @@
+"""Test for the db plan of the money options"""
+
+from typing import Any
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+
+from app.models.database import db
+from app.service.money_spend_service import MoneySpendService, switch_model_dict
+
+
+def test_money_options_use_faction_index(app: Flask) -> None:
+    """Test case for the joined rows of a faction found by its index"""
+    statements: list[tuple[str, Any]] = []
+
+    def capture(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        MoneySpendService().get_data_by_faction_db(1, switch_model_dict["tanks"])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    statement, parameters = statements[-1]
+    plan = db.session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    details = [row[-1] for row in plan]
+    assert any("ix_tankxfaction_faction_id_active" in detail for detail in details)
@@ -7,7 +7,9 @@ from typing import NamedTuple, Optional
 from app.error.custom_exc import BadModelException
 from app.models.models import Boat, BoatXFaction
 from app.models.schemas import MoneySpendRequest
-from app.service.money_spend_service import MoneySpendService
+from app.models.snapshots import MoneyOption
+from app.service.cache_service import CachePolicy
+from app.service.money_spend_service import MoneySpendService, switch_model_dict
 
 
 class DbResultRow(NamedTuple):
@@ -119,12 +121,35 @@ class TestMoneySpendService(TestCase):
         data = [self.TANYA_ROW]
         cache_service = self._cache_service_mock.return_value
         cache_service.fetch_from_cache_or_else.return_value = data
-        result = self.money_spend_service.fetch_cached_data_or_else("boats", 1, {})
+        result = self.money_spend_service.fetch_cached_data_or_else(
+            "boats", 1, switch_model_dict["boats"]
+        )
         self.assertEqual(1, len(result))
         self.assertEqual("Tanya", result[0].name)
         cache_service.fetch_from_cache_or_else.assert_called_once()
         mock_get_data_by_faction_db.assert_not_called()
 
+    @patch("app.service.money_spend_service.get_cache_policy")
+    @patch("app.service.money_spend_service.MoneySpendService.get_data_by_faction_db")
+    def test_fetch_cached_data_or_else_disabled(
+        self, mock_get_data_by_faction_db: Mock, mock_get_cache_policy: Mock
+    ) -> None:
+        """Test for fetch_cached_data_or_else when money is not cached"""
+        mock_get_cache_policy.return_value = CachePolicy(300, 60, enabled=False)
+        mock_get_data_by_faction_db.return_value = [self.TANYA_ROW]
+        result = self.money_spend_service.fetch_cached_data_or_else(
+            "boats", 1, switch_model_dict["boats"]
+        )
+        self.assertEqual([self.TANYA_ROW], result)
+        mock_get_cache_policy.assert_called_once_with("boats-money")
+        cache_service = self._cache_service_mock.return_value
+        cache_service.fetch_from_cache_or_else.assert_not_called()
+
+    def test_get_cache_tags(self) -> None:
+        """Test for get_cache_tags"""
+        result = MoneySpendService.get_cache_tags(3, switch_model_dict["boats"])
+        self.assertEqual(["boats", "boatxfactions-faction_id-3"], result)
+
     def test_spend_money(self) -> None:
         """Test for spend_money"""
         result = self.money_spend_service.spend_money(
@@ -134,12 +159,11 @@ class TestMoneySpendService(TestCase):
 
     def test_get_data_by_faction_db(self) -> None:
         """Test for get_data_by_faction_db"""
-        data_result = [{"name": "Tanya", "base_cost": 1500, "build_limit": True}]
-        self._db_execute_mock.return_value.fetchall.return_value = data_result
+        self._db_execute_mock.return_value = [("Tanya", 1500, True, None)]
         data_dict = {
             "model_1": Boat,
             "model_2": BoatXFaction,
             "on_clause": Boat.boat_id == BoatXFaction.boat_id,
         }
         result = self.money_spend_service.get_data_by_faction_db(1, data_dict)
-        self.assertEqual(data_result, result)
+        self.assertEqual([MoneyOption("Tanya", 1500, True, None)], result)
@@ -0,0 +1,47 @@
+"""Test Service layer for cache warmup service"""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, Mock, patch
+
+from app.service.warmup_service import CacheWarmupService
+
+
+class TestCacheWarmupService(TestCase):
+    """Test cases for cache warmup service class"""
+
+    def setUp(self) -> None:
+        """Set up patches and test class"""
+        self._money_patch = patch("app.service.warmup_service.MoneySpendService")
+        self._get_all_patch = patch("app.service.warmup_service.get_all")
+        self._money_mock = self._money_patch.start()
+        self._get_all_mock = self._get_all_patch.start()
+        self.warmup_service = CacheWarmupService(max_workers=2)
+
+    def tearDown(self) -> None:
+        """Stop all patches."""
+        self._money_patch.stop()
+        self._get_all_patch.stop()
+
+    def test_get_money_loaders(self) -> None:
+        """Test case for get_money_loaders"""
+        self._get_all_mock.return_value = [Mock(faction_id=1), Mock(faction_id=2)]
+        loaders = self.warmup_service.get_money_loaders()
+        self.assertEqual(10, len(loaders))
+        loaders["boats-money-2"]()
+        money_service = self._money_mock.return_value
+        money_service.fetch_cached_data_or_else.assert_called_once()
+        self.assertEqual(
+            ("boats", 2), money_service.fetch_cached_data_or_else.call_args.args[:2]
+        )
+
+    def test_warm(self) -> None:
+        """Test case for warm with a failing loader"""
+        boats_loader = Mock()
+        failing_loader = Mock(side_effect=RuntimeError("db down"))
+        result = self.warmup_service.warm(
+            MagicMock(), {"boats": boats_loader, "tanks": failing_loader}
+        )
+        self.assertEqual(1, result["loaded"])
+        self.assertEqual(["tanks"], result["failed"])
+        self.assertGreaterEqual(result["elapsed_ms"], 0)
+        boats_loader.assert_called_once()